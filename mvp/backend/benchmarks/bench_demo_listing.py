@@ -0,0 +1,92 @@
+"""
+Benchmark: admin listing latency, keyset cursor vs OFFSET, by page depth
+
+Fills demo_requests up to --rows (bulk insert, statuses spread across
+rows), then times fetching a page at increasing depths:
+    keyset: list_demo_requests_page with the cursor of the previous row
+    offset: the same ORDER BY with OFFSET, as a page-number API would do
+
+Run from mvp/backend against a local database, e.g.:
+    DATABASE_URL=sqlite:////tmp/competeintel.db python -m benchmarks.bench_demo_listing --rows 1000000
+"""
+
+import argparse
+import logging
+import time
+
+from sqlalchemy import func, select, update
+
+from models.database import DemoRequest, DemoRequestStatus, SessionLocal, init_db
+from models.schemas import DemoRequestCreate
+from services.demo_service import bulk_store_demo_requests, encode_cursor, list_demo_requests_page
+
+BATCH_SIZE = 10000
+
+
+def _fill(db, rows: int) -> None:
+    existing = db.scalar(select(func.count()).select_from(DemoRequest))
+    demo = DemoRequestCreate(
+        business_name="Bench",
+        email="bench@example.com",
+        city="São Paulo",
+        state="SP",
+        category="Padaria"
+    )
+    while existing < rows:
+        batch = min(BATCH_SIZE, rows - existing)
+        bulk_store_demo_requests([demo] * batch, db)
+        existing += batch
+    # Spread statuses so filtered listings have something to skip
+    db.execute(
+        update(DemoRequest)
+        .where(func.substr(DemoRequest.id, 1, 1).in_(["0", "1", "2", "3"]))
+        .values(status=DemoRequestStatus.COMPLETED)
+    )
+    db.commit()
+
+
+def _timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    init_db()
+    db = SessionLocal()
+    try:
+        _fill(db, args.rows)
+        order = (DemoRequest.created_at.desc(), DemoRequest.id.desc())
+
+        depth = 0
+        while depth < args.rows:
+            anchor = db.execute(
+                select(DemoRequest.created_at, DemoRequest.id).order_by(*order).offset(max(depth - 1, 0)).limit(1)
+            ).first()
+            cursor = encode_cursor(*anchor) if depth else None
+
+            keyset_ms = _timed(lambda: list_demo_requests_page(db, args.limit, cursor))
+            filtered_ms = _timed(lambda: list_demo_requests_page(db, args.limit, cursor, DemoRequestStatus.PENDING))
+            offset_ms = _timed(lambda: db.scalars(
+                select(DemoRequest).order_by(*order).offset(depth).limit(args.limit + 1)
+            ).all())
+            print(
+                f"depth {depth:>9}: keyset {keyset_ms:8.2f} ms, "
+                f"keyset+status {filtered_ms:8.2f} ms, offset {offset_ms:8.2f} ms"
+            )
+            depth = depth * 10 if depth else 1000
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
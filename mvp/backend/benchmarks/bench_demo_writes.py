@@ -0,0 +1,132 @@
+"""
+Benchmark: database round trips and latency per demo request
+
+Counts statements and commits (engine events) for:
+    single: store_demo_request + process_demo_request, as the API and
+        job queue run them (mock email, inline search executor); the
+        commits of each are also reported per request
+    bulk: bulk_store_demo_requests for --bulk rows in one executemany
+
+--check exits non-zero when a request commits more than STORE_COMMITS
+on store or JOB_COMMITS in its job. Run from mvp/backend against a local
+database, e.g.:
+    DATABASE_URL=sqlite:////tmp/competeintel.db python -m benchmarks.bench_demo_writes --requests 50 --bulk 5000 --check
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+from models.database import SessionLocal, AsyncSessionLocal, USE_ASYNC_DB, engine, async_engine, init_db
+from models.schemas import DemoRequestCreate
+from services.demo_service import (
+    store_demo_request,
+    store_demo_request_async,
+    bulk_store_demo_requests,
+    process_demo_request
+)
+from services.executor import pipeline_executor
+
+# Commits per request: the INSERT, then the job's start (UPDATE ... RETURNING) and results
+STORE_COMMITS = 1
+JOB_COMMITS = 2
+
+
+def _count_round_trips(target, counts: Counter) -> None:
+    @event.listens_for(target, "before_cursor_execute")
+    def statement(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"] += 1
+
+    @event.listens_for(target, "commit")
+    def commit(conn):
+        counts["commits"] += 1
+
+
+def _demo(i: int) -> DemoRequestCreate:
+    return DemoRequestCreate(
+        business_name=f"Bench {i}",
+        email=f"bench{i}@example.com",
+        city="São Paulo",
+        state="SP",
+        category="Padaria"
+    )
+
+
+async def _single(requests: int, counts: Counter) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        before = counts["commits"]
+        if USE_ASYNC_DB:
+            async with AsyncSessionLocal() as db:
+                response = await store_demo_request_async(_demo(i), db)
+        else:
+            db = SessionLocal()
+            try:
+                response = await asyncio.to_thread(store_demo_request, _demo(i), db)
+            finally:
+                db.close()
+        stored = counts["commits"]
+        await process_demo_request(response.id)
+        counts["store_commits"] = max(counts["store_commits"], stored - before)
+        counts["job_commits"] = max(counts["job_commits"], counts["commits"] - stored)
+    return time.perf_counter() - started
+
+
+def _bulk(rows: int) -> float:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        bulk_store_demo_requests([_demo(i) for i in range(rows)], db)
+    finally:
+        db.close()
+    return time.perf_counter() - started
+
+
+def _report(name: str, counts: Counter, items: int, elapsed: float) -> None:
+    print(
+        f"{name:>7}: {items} requests, "
+        f"{counts['statements']} statements ({counts['statements'] / items:.4f}/request), "
+        f"{counts['commits']} commits ({counts['commits'] / items:.4f}/request), "
+        f"{elapsed / items * 1000:.3f} ms/request"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--bulk", type=int, default=5000)
+    parser.add_argument("--check", action="store_true", help="Fail if a request needs more commits than expected")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    pipeline_executor.mode = "inline"
+    init_db()
+
+    counts = Counter()
+    _count_round_trips(engine, counts)
+    if async_engine is not None:
+        _count_round_trips(async_engine.sync_engine, counts)
+
+    async def single() -> float:
+        elapsed = await _single(args.requests, counts)
+        if async_engine is not None:
+            await async_engine.dispose()
+        return elapsed
+
+    elapsed = asyncio.run(single())
+    _report("single", counts, args.requests, elapsed)
+    print(f"{'':>7}  most commits per request: store {counts['store_commits']}, job {counts['job_commits']}")
+    if args.check and (counts["store_commits"] > STORE_COMMITS or counts["job_commits"] > JOB_COMMITS):
+        raise SystemExit(f"expected at most {STORE_COMMITS} store and {JOB_COMMITS} job commits per request")
+
+    counts.clear()
+    elapsed = _bulk(args.bulk)
+    _report("bulk", counts, args.bulk, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: analysis email rendering throughput (HTML + plaintext)
+
+Renders --emails messages for --markets distinct analyses, cycling
+recipients over the markets as a digest send would, and reports emails
+per minute for:
+    full: analysis_fragments + render_email for every email
+    per-recipient: fragments built once per market, render_email per email
+    render cache: render_analysis_email with the analysis hash, through
+        EMAIL_RENDER_CACHE (sized with --cache-bytes to show eviction)
+
+Pure CPU, no database or SMTP. Run from mvp/backend:
+    python -m benchmarks.bench_email_render --emails 50000 --markets 50 --cache-bytes 33554432
+"""
+
+import argparse
+import time
+
+from services.email_service import EMAIL_RENDER_CACHE, render_analysis_email
+from services.email_templates import analysis_fragments, render_email
+
+
+def _analysis(market: int, competitors: int) -> dict:
+    return {
+        "competitors": [
+            {"name": f"Padaria {market}-{i} & Filhos", "rating": 3.5 + (i % 15) / 10, "review_count": 40 + i * 7}
+            for i in range(competitors)
+        ],
+        "analytics": {
+            "market_density": {
+                "total_competitors": competitors,
+                "density_level": "high",
+                "market_saturation_score": 72.5
+            },
+            "kpi_recommendations": [
+                {
+                    "metric": f"Métrica {k}",
+                    "current_value": "4.1",
+                    "benchmark_value": "4.5",
+                    "recommendation": "Responda às avaliações negativas em até 24 horas <e> incentive novas avaliações.",
+                    "priority": ("High", "Medium", "Low")[k % 3]
+                }
+                for k in range(5)
+            ]
+        },
+        "total_found": competitors,
+        "search_radius_km": 5.0
+    }
+
+
+def _report(name: str, emails: int, elapsed: float, size: int) -> None:
+    print(
+        f"{name:>14}: {emails / elapsed * 60:12,.0f} emails/min "
+        f"({elapsed / emails * 1e6:6.1f} us/email, {size:,} bytes html+text)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--emails", type=int, default=50000)
+    parser.add_argument("--markets", type=int, default=50)
+    parser.add_argument("--competitors", type=int, default=20)
+    parser.add_argument("--cache-bytes", type=int, default=EMAIL_RENDER_CACHE.max_size)
+    args = parser.parse_args()
+
+    analyses = [_analysis(m, args.competitors) for m in range(args.markets)]
+    recipients = [(f"Negócio {i}", "São Paulo", "SP", "Padaria") for i in range(args.emails)]
+
+    started = time.perf_counter()
+    for i, recipient in enumerate(recipients):
+        html, text = render_email(analysis_fragments(analyses[i % args.markets]), *recipient)
+    _report("full", args.emails, time.perf_counter() - started, len(html) + len(text))
+
+    started = time.perf_counter()
+    fragments = [analysis_fragments(analysis) for analysis in analyses]
+    for i, recipient in enumerate(recipients):
+        html, text = render_email(fragments[i % args.markets], *recipient)
+    _report("per-recipient", args.emails, time.perf_counter() - started, len(html) + len(text))
+
+    EMAIL_RENDER_CACHE.max_size = args.cache_bytes
+    hashes = [f"bench-{m}" for m in range(args.markets)]
+    started = time.perf_counter()
+    for i, recipient in enumerate(recipients):
+        market = i % args.markets
+        _, html, text = render_analysis_email(*recipient, analyses[market], hashes[market])
+    _report("render cache", args.emails, time.perf_counter() - started, len(html) + len(text))
+    print(f"{'':>14}  {EMAIL_RENDER_CACHE.stats()}")
+
+
+if __name__ == "__main__":
+    main()
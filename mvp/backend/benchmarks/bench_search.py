@@ -0,0 +1,114 @@
+"""
+Benchmark: /api/search model construction and serialization cost
+
+Compares, per request:
+    validated: Competitor models built with full validation, then the
+        response validated again and serialized, as FastAPI does for a
+        response_model endpoint
+    fast: trusted records built with model_construct and the response
+        serialized once with model_dump_json (current endpoint)
+
+Reports CPU time (process_time) and peak allocated bytes (tracemalloc)
+per request. Run from mvp/backend:
+    python -m benchmarks.bench_search --requests 500 --max-results 50
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from models.schemas import CompetitorSearchRequest, CompetitorSearchResponse
+from services import competitor_service
+from services.competitor_service import search_competitors
+from services.analysis_service import generate_analytics
+
+
+def _validated(request: CompetitorSearchRequest) -> bytes:
+    competitor_service.VALIDATE_INTERNAL_DATA = True
+    competitors = search_competitors(
+        category=request.category.value,
+        city=request.city,
+        radius_km=request.radius_km,
+        max_results=request.max_results
+    )
+    analytics = generate_analytics(competitors, request.radius_km)
+    response = CompetitorSearchResponse(
+        query=request,
+        competitors=competitors,
+        analytics=analytics,
+        total_found=len(competitors),
+        search_radius_km=request.radius_km
+    )
+    # FastAPI: dump the returned object, validate against response_model, serialize
+    validated = CompetitorSearchResponse.model_validate(response.model_dump())
+    return json.dumps(validated.model_dump(mode="json")).encode("utf-8")
+
+
+def _fast(request: CompetitorSearchRequest) -> bytes:
+    competitor_service.VALIDATE_INTERNAL_DATA = False
+    competitors = search_competitors(
+        category=request.category.value,
+        city=request.city,
+        radius_km=request.radius_km,
+        max_results=request.max_results
+    )
+    analytics = generate_analytics(competitors, request.radius_km)
+    response = CompetitorSearchResponse.model_construct(
+        query=request,
+        competitors=competitors,
+        analytics=analytics,
+        total_found=len(competitors),
+        search_radius_km=request.radius_km
+    )
+    return response.model_dump_json().encode("utf-8")
+
+
+def _measure(fn, request: CompetitorSearchRequest, requests: int) -> dict:
+    fn(request)  # warm caches and indexes
+
+    started = time.process_time()
+    for _ in range(requests):
+        fn(request)
+    cpu = time.process_time() - started
+
+    # Peak traced memory above the starting point, per request
+    tracemalloc.start()
+    sample = min(requests, 50)
+    peaks = 0
+    for _ in range(sample):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        fn(request)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - current
+    tracemalloc.stop()
+
+    return {
+        "cpu_ms_per_request": round(cpu / requests * 1000, 3),
+        "peak_alloc_kb_per_request": round(peaks / sample / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--max-results", type=int, default=50)
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    args = parser.parse_args()
+
+    request = CompetitorSearchRequest(
+        category="Padaria",
+        city="São Paulo",
+        radius_km=args.radius_km,
+        max_results=args.max_results
+    )
+
+    assert json.loads(_validated(request)) == json.loads(_fast(request)), "fast path output differs"
+
+    for name, fn in (("validated", _validated), ("fast", _fast)):
+        print(f"{name:>10}: {_measure(fn, request, args.requests)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: burst of concurrent identical searches, with and without coalescing
+
+Fires --requests concurrent execute_search_pipeline calls spread over
+--distinct parameter sets (a campaign landing: most requests identical),
+with search_flights enabled and disabled, and reports wall time, pipeline
+runs and per-call latency. Run from mvp/backend:
+    python -m benchmarks.bench_singleflight --requests 500 --distinct 5 --max-results 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from services.executor import pipeline_executor
+from services.search_pipeline import execute_search_pipeline, search_flights
+
+CITIES = ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Curitiba", "Porto Alegre", "Salvador", "Recife", "Fortaleza"]
+
+
+async def _burst(requests: int, distinct: int, max_results: int) -> dict:
+    latencies = []
+
+    async def call(i: int) -> None:
+        started = time.perf_counter()
+        await execute_search_pipeline(
+            category="Padaria",
+            city=CITIES[i % distinct % len(CITIES)],
+            coordinates=None,
+            radius_km=5.0 + i % distinct // len(CITIES),
+            max_results=max_results,
+            neighborhood=None,
+            cep=None,
+            your_business=None
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    executions = search_flights.counters["executions"]
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "wall_ms": round(elapsed * 1000, 1),
+        "pipeline_runs": search_flights.counters["executions"] - executions,
+        "p50_ms": round(latencies[len(latencies) // 2], 1),
+        "max_ms": round(latencies[-1], 1),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    # Warm caches and indexes so both modes measure the same work
+    await _burst(args.distinct, args.distinct, args.max_results)
+    for enabled in (False, True):
+        search_flights.enabled = enabled
+        name = "coalesced" if enabled else "independent"
+        print(f"{name:>11}: {await _burst(args.requests, args.distinct, args.max_results)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=5)
+    parser.add_argument("--max-results", type=int, default=50)
+    args = parser.parse_args()
+
+    # A burst larger than the executor's queue limit would be rejected
+    pipeline_executor.max_pending = max(pipeline_executor.max_pending, args.requests)
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        pipeline_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
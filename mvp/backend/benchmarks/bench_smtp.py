@@ -0,0 +1,138 @@
+"""
+Benchmark: SMTP send throughput and latency against a local sink
+
+Starts a local SMTP sink in a child process (aiosmtpd, a dev-only
+dependency: pip install aiosmtpd) that accepts and counts messages,
+optionally adding per-message latency to mimic a remote relay, then sends
+--messages analysis emails through SMTPSender with --concurrency in
+flight.
+
+Compares the pooled sender with a connection per message. Run from
+mvp/backend:
+    python -m benchmarks.bench_smtp --messages 2000 --concurrency 64 --pool-size 8 --server-delay-ms 5
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+
+from aiosmtpd.controller import Controller
+
+from services.email_service import format_email_html, format_email_plaintext
+from services.smtp_sender import SMTPSender, build_message
+
+SINK_PORT = 8025
+
+
+class SinkHandler:
+    """Accepts every message after an optional delay"""
+
+    def __init__(self, delay_s: float, received):
+        self.delay_s = delay_s
+        self.received = received
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        with self.received.get_lock():
+            self.received.value += 1
+        return "250 Message accepted for delivery"
+
+
+def run_sink(port: int, delay_s: float, received, ready, stop) -> None:
+    """SMTP sink process: serve until stop is set"""
+    # aiosmtpd logs every SMTP command at INFO
+    logging.getLogger("mail.log").setLevel(logging.WARNING)
+    controller = Controller(SinkHandler(delay_s, received), hostname="127.0.0.1", port=port)
+    controller.start()
+    ready.set()
+    stop.wait()
+    controller.stop()
+
+
+def _analysis() -> dict:
+    return {
+        "competitors": [],
+        "analytics": {
+            "market_density": {"total_competitors": 12, "density_level": "high", "competitors_per_km2": 0.15, "avg_distance_km": 2.1},
+            "competitive_positioning": None,
+            "market_share_estimate": None,
+            "kpi_recommendations": [],
+            "summary": "Mercado competitivo."
+        },
+        "total_found": 12,
+        "search_radius_km": 5.0
+    }
+
+
+async def _run(sender: SMTPSender, messages: int, concurrency: int) -> float:
+    analysis = _analysis()
+    html = format_email_html("Padaria Bench", "São Paulo", "SP", "Padaria", analysis)
+    text = format_email_plaintext("Padaria Bench", "São Paulo", "SP", "Padaria", analysis)
+    domains = ["gmail.com", "hotmail.com", "yahoo.com.br", "uol.com.br"]
+    gate = asyncio.Semaphore(concurrency)
+
+    async def send(i: int) -> None:
+        async with gate:
+            to_email = f"user{i}@{domains[i % len(domains)]}"
+            await sender.send(build_message("noreply@competeintel.com.br", to_email, "Análise Competitiva", html, text))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(messages)))
+    elapsed = time.perf_counter() - started
+    await sender.close()
+    return elapsed
+
+
+async def main_async(args: argparse.Namespace, received) -> None:
+    for name, max_messages in (("pooled", 100), ("per-message", 1)):
+        sender = SMTPSender(
+            hostname="127.0.0.1",
+            port=SINK_PORT,
+            username=None,
+            password=None,
+            start_tls=False,
+            use_tls=False,
+            pool_size=args.pool_size,
+            per_domain_limit=args.per_domain_limit,
+            max_messages_per_connection=max_messages
+        )
+        received_before = received.value
+        elapsed = await _run(sender, args.messages, args.concurrency)
+        stats = sender.stats()
+        print(
+            f"{name:>11}: {args.messages / elapsed:8.1f} msg/s, "
+            f"latency avg {stats['send_latency']['avg_ms']} ms max {stats['send_latency']['max_ms']} ms, "
+            f"connections {stats['connections_opened']}, received {received.value - received_before}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--per-domain-limit", type=int, default=4)
+    parser.add_argument("--server-delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    received = multiprocessing.Value("i", 0)
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    sink = multiprocessing.Process(
+        target=run_sink,
+        args=(SINK_PORT, args.server_delay_ms / 1000, received, ready, stop),
+        daemon=True
+    )
+    sink.start()
+    ready.wait(10)
+    try:
+        asyncio.run(main_async(args, received))
+    finally:
+        stop.set()
+        sink.join(5)
+
+
+if __name__ == "__main__":
+    main()
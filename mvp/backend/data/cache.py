@@ -0,0 +1,94 @@
+"""
+Bounded in-process LRU cache with size accounting
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by total entry size
+
+    Each entry carries a size (bytes, or any unit the caller chooses);
+    least recently used entries are evicted until the total fits in
+    max_size. Hits, misses and evictions are counted for metrics.
+    """
+
+    def __init__(self, max_size: int, sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Get without touching recency or counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        size = self.sizeof(value) if size is None else size
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_size -= old[1]
+            self._entries[key] = (value, size)
+            self.current_size += size
+            # Always keep the newest entry, even if it alone exceeds max_size
+            while self.current_size > self.max_size and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_size -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.current_size -= entry[1]
+            return entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_size = 0
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Snapshot of (key, value) pairs, least recently used first"""
+        with self._lock:
+            return iter([(key, value) for key, (value, _) in self._entries.items()])
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self.current_size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
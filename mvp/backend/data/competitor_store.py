@@ -0,0 +1,425 @@
+"""
+Columnar, memory-mapped competitor store
+
+A store is a directory with one .npy file per column plus meta.json:
+    lat, lng                   float64
+    rating                     float32
+    review_count               int32
+    estimated_monthly_revenue  int64
+    flags                      uint8 bitfield (see FLAG_BITS)
+    name, street               int32 codes into string tables
+    neighborhood, employee_bucket  uint8 codes into string tables
+    ...and a few more compact numeric columns (see COLUMNS)
+
+String tables are stored as <table>.offsets.npy + <table>.data.npy
+(UTF-8 bytes). Columns are opened with mmap_mode="r", so every Uvicorn
+worker maps the same page cache and opening a store is instant. Markets
+(city, category) are contiguous row ranges listed in meta.json.
+
+Build one with:
+    python -m data.corpus --per-market 100000 --format store --output ./competitor_store
+"""
+
+import json
+import os
+import sys
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from data.mock_competitors import (
+    CITIES,
+    BUSINESS_CATEGORIES,
+    STREET_PREFIXES,
+    STREET_NAMES,
+    NEIGHBORHOODS,
+    AREA_CODES,
+    LOCATION_NAMES,
+    EMPLOYEE_COUNT_BUCKETS,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPETITOR_STORE_PATH = os.getenv("COMPETITOR_STORE_PATH")
+
+STORE_FORMAT_VERSION = 1
+
+COLUMNS = {
+    "lat": np.float64,
+    "lng": np.float64,
+    "rating": np.float32,
+    "review_count": np.int32,
+    "estimated_monthly_revenue": np.int64,
+    "flags": np.uint8,
+    "instagram_followers": np.int32,
+    "facebook_likes": np.int32,
+    "name": np.int32,
+    "street": np.int32,
+    "neighborhood": np.uint8,
+    "postal_code": np.int32,
+    "cnpj": np.int64,
+    "phone": np.int64,
+    "opening_year": np.int16,
+    "employee_bucket": np.uint8,
+}
+
+STRING_TABLES = ["names", "streets", "neighborhoods", "employee_buckets"]
+
+FLAG_BITS = {
+    "has_instagram": 0,
+    "has_facebook": 1,
+    "has_website": 2,
+    "is_verified": 3,
+    "has_delivery": 4,
+    "accepts_pix": 5,
+    "accepts_cards": 6,
+}
+
+
+class StringTable:
+    """Immutable list of strings stored as UTF-8 bytes plus offsets"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings: List[str]) -> "StringTable":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code: int) -> str:
+        start, stop = int(self.offsets[code]), int(self.offsets[code + 1])
+        return self.data[start:stop].tobytes().decode("utf-8")
+
+    def to_list(self) -> List[str]:
+        return [self[i] for i in range(len(self))]
+
+
+def _format_cnpj(value: int) -> str:
+    d = f"{value:014d}"
+    return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"
+
+
+def _format_phone(value: int) -> str:
+    ddd, rest = divmod(value, 10 ** 8)
+    rest = f"{rest:08d}"
+    return f"({ddd}) 9{rest[:4]}-{rest[4:]}"
+
+
+def _format_cep(value: int) -> str:
+    d = f"{value:08d}"
+    return f"{d[:5]}-{d[5:]}"
+
+
+class MarketView:
+    """
+    Columns of one (city, category) market
+
+    Every column is a zero-copy slice of the store, so filtering and
+    distance math run on arrays and only selected rows become dicts.
+    """
+
+    def __init__(self, store: "CompetitorStore", city: str, category: str, start: int, stop: int):
+        self.store = store
+        self.city = city
+        self.category = category
+        self.start = start
+        self.columns = {name: column[start:stop] for name, column in store.columns.items()}
+        self.lat = self.columns["lat"]
+        self.lng = self.columns["lng"]
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def filter_mask(
+        self,
+        indices: np.ndarray,
+        neighborhood: Optional[str] = None,
+        cep_clean: Optional[str] = None
+    ) -> np.ndarray:
+        """Which of `indices` pass the neighborhood (substring) and CEP (first 5 digits) filters"""
+        mask = np.ones(len(indices), dtype=bool)
+
+        if neighborhood:
+            needle = neighborhood.lower()
+            codes = [i for i, name in enumerate(self.store.tables["neighborhoods"].to_list()) if needle in name.lower()]
+            mask &= np.isin(self.columns["neighborhood"][indices], codes)
+
+        if cep_clean:
+            if len(cep_clean) != 8 or not cep_clean.isdigit():
+                return np.zeros(len(indices), dtype=bool)
+            mask &= (self.columns["postal_code"][indices] // 1000) == int(cep_clean[:5])
+
+        return mask
+
+    def record(self, i: int) -> Dict:
+        """Materialize row i as a dict shaped like generate_mock_competitors output"""
+        c = self.columns
+        tables = self.store.tables
+        category_data = BUSINESS_CATEGORIES[self.category]
+        flags = int(c["flags"][i])
+
+        def flag(name: str) -> bool:
+            return bool(flags >> FLAG_BITS[name] & 1)
+
+        return {
+            "id": f"mock_{self.category.lower()}_{self.city.lower().replace(' ', '_')}_{i + 1}",
+            "name": tables["names"][int(c["name"][i])],
+            "category": self.category,
+            "cnae_code": category_data["cnae"],
+            "cnae_description": category_data["description"],
+            "cnpj": _format_cnpj(int(c["cnpj"][i])),
+            "coordinates": {
+                "latitude": float(c["lat"][i]),
+                "longitude": float(c["lng"][i])
+            },
+            "address": {
+                "street": tables["streets"][int(c["street"][i])],
+                "neighborhood": tables["neighborhoods"][int(c["neighborhood"][i])],
+                "city": self.city,
+                "state": CITIES[self.city]["state"],
+                "postal_code": _format_cep(int(c["postal_code"][i])),
+                "country": "Brasil"
+            },
+            "phone": _format_phone(int(c["phone"][i])),
+            "rating": round(float(c["rating"][i]), 1),
+            "review_count": int(c["review_count"][i]),
+            "online_presence": {
+                "has_instagram": flag("has_instagram"),
+                "has_facebook": flag("has_facebook"),
+                "has_website": flag("has_website"),
+                "instagram_followers": int(c["instagram_followers"][i]),
+                "facebook_likes": int(c["facebook_likes"][i])
+            },
+            "is_verified": flag("is_verified"),
+            "opening_year": int(c["opening_year"][i]),
+            "employee_count_estimate": tables["employee_buckets"][int(c["employee_bucket"][i])],
+            "estimated_monthly_revenue": int(c["estimated_monthly_revenue"][i]),
+            "has_delivery": flag("has_delivery"),
+            "accepts_pix": flag("accepts_pix"),
+            "accepts_cards": flag("accepts_cards"),
+        }
+
+
+class RecordsMarket:
+    """
+    Market over a list of competitor dicts (mock generator or provider data)
+
+    Exposes the same interface as MarketView so search code does not care
+    where the data lives. Only the columns used for filtering are extracted.
+    """
+
+    def __init__(self, records: List[Dict]):
+        self.records = records
+        count = len(records)
+        self.lat = np.fromiter((r["coordinates"]["latitude"] for r in records), dtype=np.float64, count=count)
+        self.lng = np.fromiter((r["coordinates"]["longitude"] for r in records), dtype=np.float64, count=count)
+        self._neighborhoods = [r["address"]["neighborhood"].lower() for r in records]
+        self._cep_prefix = np.fromiter((self._cep_prefix_of(r) for r in records), dtype=np.int64, count=count)
+
+    @staticmethod
+    def _cep_prefix_of(record: Dict) -> int:
+        """First 5 CEP digits as an int, -1 when the record's CEP is malformed"""
+        try:
+            cep = record["address"]["postal_code"].replace("-", "").replace(".", "").replace(" ", "")
+        except (KeyError, AttributeError, TypeError):
+            return -1
+        return int(cep[:5]) if len(cep) == 8 and cep.isdigit() else -1
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def filter_mask(
+        self,
+        indices: np.ndarray,
+        neighborhood: Optional[str] = None,
+        cep_clean: Optional[str] = None
+    ) -> np.ndarray:
+        """Which of `indices` pass the neighborhood (substring) and CEP (first 5 digits) filters"""
+        mask = np.ones(len(indices), dtype=bool)
+
+        if neighborhood:
+            needle = neighborhood.lower()
+            mask &= np.fromiter((needle in self._neighborhoods[i] for i in indices.tolist()), dtype=bool, count=len(indices))
+
+        if cep_clean:
+            if len(cep_clean) != 8 or not cep_clean.isdigit():
+                return np.zeros(len(indices), dtype=bool)
+            mask &= self._cep_prefix[indices] == int(cep_clean[:5])
+
+        return mask
+
+    def record(self, i: int) -> Dict:
+        return self.records[i]
+
+    def nbytes(self) -> int:
+        """Approximate memory of the extracted columns (records not included)"""
+        return (
+            self.lat.nbytes + self.lng.nbytes + self._cep_prefix.nbytes
+            + sys.getsizeof(self._neighborhoods) + sum(map(sys.getsizeof, self._neighborhoods))
+        )
+
+
+class CompetitorStore:
+    """Columnar competitor dataset covering one or more (city, category) markets"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], tables: Dict[str, StringTable], markets: List[Dict]):
+        self.columns = columns
+        self.tables = tables
+        self.markets = {(m["city"], m["category"]): (m["start"], m["stop"]) for m in markets}
+        self._views = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["lat"])
+
+    def has_market(self, city: str, category: str) -> bool:
+        return (city, category) in self.markets
+
+    def market(self, city: str, category: str) -> MarketView:
+        """Get the (cached) view over one market's rows"""
+        key = (city, category)
+        view = self._views.get(key)
+        if view is None:
+            start, stop = self.markets[key]
+            view = MarketView(self, city, category, start, stop)
+            self._views[key] = view
+        return view
+
+    @classmethod
+    def from_corpus(cls, corpus: Dict[str, np.ndarray]) -> "CompetitorStore":
+        """Build an in-memory store from data.corpus.generate_corpus output"""
+        city_names = list(CITIES)
+        category_names = list(BUSINESS_CATEGORIES)
+        city_code = corpus["city_code"].astype(np.int64)
+        category_code = corpus["category_code"].astype(np.int64)
+
+        # Names: dictionary-encode (category, city, template, location) combinations
+        name_key = ((category_code * len(city_names) + city_code) * 256 + corpus["name_template"]) * 256 + corpus["name_location"]
+        name_keys, name_codes = np.unique(name_key, return_inverse=True)
+        names = []
+        for key in name_keys.tolist():
+            key, location = divmod(key, 256)
+            key, template = divmod(key, 256)
+            category, city = divmod(key, len(city_names))
+            city_name = city_names[city]
+            location_name = (LOCATION_NAMES + [city_name])[location]
+            names.append(BUSINESS_CATEGORIES[category_names[category]]["names"][template].format(location_name))
+
+        # Streets: dictionary-encode (prefix, name, number)
+        street_key = (corpus["street_prefix"].astype(np.int64) * len(STREET_NAMES) + corpus["street_name"]) * 1000 + corpus["street_number"]
+        street_keys, street_codes = np.unique(street_key, return_inverse=True)
+        streets = []
+        for key in street_keys.tolist():
+            key, number = divmod(key, 1000)
+            prefix, name = divmod(key, len(STREET_NAMES))
+            streets.append(f"{STREET_PREFIXES[prefix]} {STREET_NAMES[name]}, {number}")
+
+        flags = np.zeros(len(corpus["lat"]), dtype=np.uint8)
+        for flag, bit in FLAG_BITS.items():
+            flags |= corpus[flag].astype(np.uint8) << bit
+
+        area_codes = np.array(AREA_CODES, dtype=np.int64)
+        columns = {
+            "lat": corpus["lat"],
+            "lng": corpus["lng"],
+            "rating": corpus["rating"],
+            "review_count": corpus["review_count"],
+            "estimated_monthly_revenue": corpus["estimated_monthly_revenue"],
+            "flags": flags,
+            "instagram_followers": corpus["instagram_followers"],
+            "facebook_likes": corpus["facebook_likes"],
+            "name": name_codes,
+            "street": street_codes,
+            "neighborhood": corpus["neighborhood"],
+            "postal_code": corpus["postal_code"],
+            "cnpj": corpus["cnpj"],
+            "phone": area_codes[corpus["area_code"]] * 10 ** 8 + corpus["phone_number"],
+            "opening_year": corpus["opening_year"],
+            "employee_bucket": corpus["employee_bucket"],
+        }
+        columns = {name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+
+        tables = {
+            "names": StringTable.from_strings(names),
+            "streets": StringTable.from_strings(streets),
+            "neighborhoods": StringTable.from_strings(NEIGHBORHOODS),
+            "employee_buckets": StringTable.from_strings(EMPLOYEE_COUNT_BUCKETS),
+        }
+
+        offsets = corpus["market_offsets"].tolist()
+        markets = [
+            {
+                "city": city_names[int(corpus["city_code"][start])],
+                "category": category_names[int(corpus["category_code"][start])],
+                "start": start,
+                "stop": stop,
+            }
+            for start, stop in zip(offsets[:-1], offsets[1:])
+            if stop > start
+        ]
+
+        return cls(columns, tables, markets)
+
+    def save(self, path: str) -> None:
+        """Write the store as a directory of .npy files plus meta.json"""
+        os.makedirs(path, exist_ok=True)
+        for name, column in self.columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), column)
+        for name, table in self.tables.items():
+            np.save(os.path.join(path, f"{name}.offsets.npy"), table.offsets)
+            np.save(os.path.join(path, f"{name}.data.npy"), table.data)
+
+        meta = {
+            "version": STORE_FORMAT_VERSION,
+            "count": len(self),
+            "markets": [
+                {"city": city, "category": category, "start": start, "stop": stop}
+                for (city, category), (start, stop) in self.markets.items()
+            ],
+        }
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def open(cls, path: str) -> "CompetitorStore":
+        """Memory-map a store directory written by save()"""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported competitor store version: {meta.get('version')}")
+
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+        tables = {
+            name: StringTable(
+                np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, f"{name}.data.npy"), mmap_mode="r"),
+            )
+            for name in STRING_TABLES
+        }
+        return cls(columns, tables, meta["markets"])
+
+
+# Process-wide store, opened once at startup when COMPETITOR_STORE_PATH is set
+_STORE: Optional[CompetitorStore] = None
+
+
+def load_competitor_store(path: Optional[str] = COMPETITOR_STORE_PATH) -> Optional[CompetitorStore]:
+    """Open the configured store (no-op when no path is configured)"""
+    global _STORE
+    if path and _STORE is None:
+        _STORE = CompetitorStore.open(path)
+        logger.info("✓ Competitor store loaded from %s (%d competitors, %d markets)", path, len(_STORE), len(_STORE.markets))
+    return _STORE
+
+
+def get_competitor_store() -> Optional[CompetitorStore]:
+    """Get the loaded store, or None when search should use generated mock data"""
+    return _STORE
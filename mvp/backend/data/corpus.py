@@ -0,0 +1,220 @@
+"""
+Seeded, vectorized synthetic competitor corpus
+
+Generates competitors for every CITIES x BUSINESS_CATEGORIES market as
+NumPy columns. Strings are stored as small integer codes into the lookup
+tables of data.mock_competitors, so millions of records fit in a few
+hundred MB and generate in seconds. Identical seeds give identical output.
+
+Usage:
+    python -m data.corpus --seed 42 --per-market 100000 --output corpus.npz
+    python -m data.corpus --per-market 100000 --format store --output ./competitor_store
+"""
+
+import argparse
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from data.mock_competitors import (
+    CITIES,
+    BUSINESS_CATEGORIES,
+    STREET_PREFIXES,
+    STREET_NAMES,
+    NEIGHBORHOODS,
+    AREA_CODES,
+    LOCATION_NAMES,
+    EMPLOYEE_COUNT_BUCKETS,
+    BASE_REVENUE,
+    SOCIAL_MEDIA,
+    MOCK_DATA_SEED,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rough conversion used by the mock generator: 1 degree ≈ 111 km
+KM_TO_DEG = 1 / 111.0
+
+SOCIAL_TIERS = ["high", "medium", "low"]
+
+
+def _generate_market(
+    rng: np.random.Generator,
+    city: str,
+    category: str,
+    count: int,
+    radius_km: float
+) -> Dict[str, np.ndarray]:
+    """Generate the columns of one (city, category) market"""
+    city_data = CITIES[city]
+    category_data = BUSINESS_CATEGORIES[category]
+
+    max_deg = radius_km * KM_TO_DEG
+    lat = np.round(city_data["lat"] + rng.uniform(-max_deg, max_deg, count), 6)
+    lng = np.round(city_data["lng"] + rng.uniform(-max_deg, max_deg, count), 6)
+
+    # Rating in 0.1 steps within [3.5, 5.0], stored as float32
+    rating = np.round(rng.uniform(3.5, 5.0, count), 1).astype(np.float32)
+    review_count = rng.integers(10, 501, count, dtype=np.int32)
+
+    # Social tier follows the same thresholds as generate_mock_competitors
+    tier = np.full(count, SOCIAL_TIERS.index("low"), dtype=np.uint8)
+    tier[(rating >= 4.0) & (review_count > 100)] = SOCIAL_TIERS.index("medium")
+    tier[(rating >= 4.5) & (review_count > 200)] = SOCIAL_TIERS.index("high")
+
+    instagram_followers = np.empty(count, dtype=np.int32)
+    facebook_likes = np.empty(count, dtype=np.int32)
+    has_instagram = np.empty(count, dtype=bool)
+    has_facebook = np.empty(count, dtype=bool)
+    has_website = np.empty(count, dtype=bool)
+    for code, name in enumerate(SOCIAL_TIERS):
+        template = SOCIAL_MEDIA[name]
+        mask = tier == code
+        n = int(mask.sum())
+        instagram_followers[mask] = rng.integers(*template["instagram_followers"], n, endpoint=True)
+        facebook_likes[mask] = rng.integers(*template["facebook_likes"], n, endpoint=True)
+        has_instagram[mask] = template["has_instagram"]
+        has_facebook[mask] = template["has_facebook"]
+        has_website[mask] = template["has_website"]
+
+    revenue_factor = (rating / 5.0) * (1 + review_count / 1000) * rng.uniform(0.7, 1.5, count)
+    revenue = (BASE_REVENUE.get(category, 30000) * revenue_factor).astype(np.int64)
+
+    # CEP: city prefix + 6 random digits, kept as the 8-digit integer
+    cep = int(city_data.get("cep_prefix", "01")) * 1_000_000 + rng.integers(0, 1_000_000, count, dtype=np.int32)
+
+    return {
+        "lat": lat,
+        "lng": lng,
+        "name_template": rng.integers(0, len(category_data["names"]), count, dtype=np.uint8),
+        # Last location code stands for the city name itself
+        "name_location": rng.integers(0, len(LOCATION_NAMES) + 1, count, dtype=np.uint8),
+        "rating": rating,
+        "review_count": review_count,
+        "social_tier": tier,
+        "has_instagram": has_instagram,
+        "has_facebook": has_facebook,
+        "has_website": has_website,
+        "instagram_followers": instagram_followers,
+        "facebook_likes": facebook_likes,
+        "estimated_monthly_revenue": revenue,
+        "cnpj": rng.integers(0, 10 ** 14, count, dtype=np.int64),
+        "area_code": rng.integers(0, len(AREA_CODES), count, dtype=np.uint8),
+        "phone_number": rng.integers(0, 10 ** 8, count, dtype=np.int32),
+        "street_prefix": rng.integers(0, len(STREET_PREFIXES), count, dtype=np.uint8),
+        "street_name": rng.integers(0, len(STREET_NAMES), count, dtype=np.uint8),
+        "street_number": rng.integers(1, 1000, count, dtype=np.int16),
+        "neighborhood": rng.integers(0, len(NEIGHBORHOODS), count, dtype=np.uint8),
+        "postal_code": cep.astype(np.int32),
+        "is_verified": rng.random(count) < 0.75,
+        "opening_year": rng.integers(2010, 2025, count, dtype=np.int16),
+        "employee_bucket": rng.integers(0, len(EMPLOYEE_COUNT_BUCKETS), count, dtype=np.uint8),
+        "has_delivery": rng.random(count) < 0.5,
+        "accepts_pix": rng.random(count) < 0.75,
+        "accepts_cards": rng.random(count) < 0.8,
+    }
+
+
+def generate_corpus(
+    per_market: int,
+    seed: int = MOCK_DATA_SEED,
+    cities: Optional[List[str]] = None,
+    categories: Optional[List[str]] = None,
+    radius_km: float = 5.0
+) -> Dict[str, np.ndarray]:
+    """
+    Generate a columnar competitor corpus
+
+    Markets are laid out contiguously, city-major. Each market draws from
+    its own generator seeded with (seed, city index, category index), so a
+    market's records do not depend on which other markets are generated.
+
+    Args:
+        per_market: Competitors per (city, category) market
+        seed: Base seed
+        cities: Subset of CITIES (default: all)
+        categories: Subset of BUSINESS_CATEGORIES (default: all)
+        radius_km: Maximum distance from city center in km
+
+    Returns:
+        Dict of column name to array, plus "city_code", "category_code"
+        (indices into CITIES / BUSINESS_CATEGORIES key order) and
+        "market_offsets" (start of each market, with a final end offset)
+    """
+    city_names = list(CITIES)
+    category_names = list(BUSINESS_CATEGORIES)
+    cities = cities or city_names
+    categories = categories or category_names
+
+    for city in cities:
+        if city not in CITIES:
+            raise ValueError(f"Unknown city: {city}")
+    for category in categories:
+        if category not in BUSINESS_CATEGORIES:
+            raise ValueError(f"Unknown category: {category}")
+
+    markets = []
+    city_codes = []
+    category_codes = []
+    for city in cities:
+        for category in categories:
+            city_code = city_names.index(city)
+            category_code = category_names.index(category)
+            rng = np.random.default_rng([seed, city_code, category_code])
+            markets.append(_generate_market(rng, city, category, per_market, radius_km))
+            city_codes.append(city_code)
+            category_codes.append(category_code)
+
+    corpus = {name: np.concatenate([m[name] for m in markets]) for name in markets[0]}
+    corpus["city_code"] = np.repeat(np.array(city_codes, dtype=np.uint8), per_market)
+    corpus["category_code"] = np.repeat(np.array(category_codes, dtype=np.uint8), per_market)
+    corpus["market_offsets"] = np.arange(len(markets) + 1, dtype=np.int64) * per_market
+    return corpus
+
+
+def save_corpus(corpus: Dict[str, np.ndarray], path: str) -> None:
+    """Write a corpus as an .npz file (uncompressed: columns are already compact codes)"""
+    np.savez(path, **corpus)
+
+
+def load_corpus(path: str) -> Dict[str, np.ndarray]:
+    """Read a corpus written by save_corpus"""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic competitor corpus")
+    parser.add_argument("--seed", type=int, default=MOCK_DATA_SEED, help="Base random seed")
+    parser.add_argument("--per-market", type=int, default=10000, help="Competitors per (city, category)")
+    parser.add_argument("--city", action="append", dest="cities", help="Restrict to a city (repeatable)")
+    parser.add_argument("--category", action="append", dest="categories", help="Restrict to a category (repeatable)")
+    parser.add_argument("--radius-km", type=float, default=5.0, help="Spread around each city center")
+    parser.add_argument(
+        "--format", choices=["npz", "store"], default="npz",
+        help="npz: single corpus file; store: memory-mappable CompetitorStore directory"
+    )
+    parser.add_argument("--output", required=True, help="Output .npz path or store directory")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    corpus = generate_corpus(args.per_market, args.seed, args.cities, args.categories, args.radius_km)
+    generated = time.perf_counter()
+    if args.format == "store":
+        # Imported here: the store module depends on this one's lookup tables only
+        from data.competitor_store import CompetitorStore
+        CompetitorStore.from_corpus(corpus).save(args.output)
+    else:
+        save_corpus(corpus, args.output)
+
+    logger.info(
+        "Generated %d competitors in %.2fs, written to %s in %.2fs",
+        len(corpus["lat"]), generated - started, args.output, time.perf_counter() - generated
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,21 @@
 Mock competitor data for Brazilian businesses across major cities
 """
 
-from typing import List, Dict
+from typing import Any, List, Dict
+import hashlib
+import os
 import random
+import sys
+
+import numpy as np
+
+from data.cache import LRUCache
+
+# Base seed for mock data: identical across processes and Uvicorn workers
+MOCK_DATA_SEED = int(os.getenv("MOCK_DATA_SEED", "42"))
+
+# Upper bound (approximate bytes) for cached mock datasets per process
+MOCK_DATA_CACHE_MAX_BYTES = int(os.getenv("MOCK_DATA_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
 
 # Major Brazilian cities with coordinates and real CEP prefixes
 CITIES = {
@@ -97,55 +110,88 @@ STREET_NAMES = [
     "Sete de Setembro", "da Independência", "Rio Branco", "Tiradentes",
     "São João", "da República", "do Mercado", "das Palmeiras"
 ]
+NEIGHBORHOODS = ["Centro", "Vila Nova", "Jardim das Flores", "Bairro Alto", "Zona Sul"]
+
+# Major city area codes (DDD) for generated phone numbers
+AREA_CODES = [11, 21, 31, 41, 51, 61, 71, 81, 85, 92]
+
+# Name suffixes; the city name itself is appended at generation time
+LOCATION_NAMES = ["Central", "Norte", "Sul", "Leste", "Oeste"]
+
+# Repeated entries weight the draw towards smaller businesses
+EMPLOYEE_COUNT_BUCKETS = ["1-5", "1-5", "6-10", "6-10", "11-25", "26-50", "50+"]
 
-# Social media presence templates
+# Typical monthly revenue (R$) per category before rating/review adjustments
+BASE_REVENUE = {
+    "Padaria": 30000,
+    "Restaurante": 50000,
+    "Farmácia": 80000,
+    "Supermercado": 150000,
+    "Cafeteria": 25000,
+    "Academia": 40000,
+    "Pet Shop": 35000,
+    "Lanchonete": 20000
+}
+
+# Social media presence templates (follower/like counts drawn per competitor)
 SOCIAL_MEDIA = {
     "high": {
         "has_instagram": True,
         "has_facebook": True,
         "has_website": True,
-        "instagram_followers": random.randint(5000, 50000),
-        "facebook_likes": random.randint(3000, 30000)
+        "instagram_followers": (5000, 50000),
+        "facebook_likes": (3000, 30000)
     },
     "medium": {
         "has_instagram": True,
         "has_facebook": True,
         "has_website": False,
-        "instagram_followers": random.randint(500, 5000),
-        "facebook_likes": random.randint(300, 3000)
+        "instagram_followers": (500, 5000),
+        "facebook_likes": (300, 3000)
     },
     "low": {
         "has_instagram": False,
         "has_facebook": True,
         "has_website": False,
-        "instagram_followers": 0,
-        "facebook_likes": random.randint(50, 500)
+        "instagram_followers": (0, 500),
+        "facebook_likes": (50, 500)
     }
 }
 
 
-def generate_cnpj() -> str:
+def market_seed(city: str, category: str, seed: int = MOCK_DATA_SEED) -> int:
+    """Stable per-(city, category) seed (unlike hash(), not salted per process)"""
+    digest = hashlib.sha256(f"{seed}:{city}:{category}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def generate_cnpj(rng: random.Random = random) -> str:
     """Generate a fake but formatted CNPJ"""
-    digits = [random.randint(0, 9) for _ in range(14)]
+    digits = [rng.randint(0, 9) for _ in range(14)]
     return f"{digits[0]}{digits[1]}.{digits[2]}{digits[3]}{digits[4]}.{digits[5]}{digits[6]}{digits[7]}/{digits[8]}{digits[9]}{digits[10]}{digits[11]}-{digits[12]}{digits[13]}"
 
 
-def generate_phone() -> str:
+def generate_phone(rng: random.Random = random) -> str:
     """Generate a Brazilian phone number"""
-    ddd = random.choice([11, 21, 31, 41, 51, 61, 71, 81, 85, 92])  # Major city area codes
+    ddd = rng.choice(AREA_CODES)
     first_digit = 9  # Mobile
-    rest = ''.join([str(random.randint(0, 9)) for _ in range(8)])
+    rest = ''.join([str(rng.randint(0, 9)) for _ in range(8)])
     return f"({ddd}) {first_digit}{rest[:4]}-{rest[4:]}"
 
 
-def generate_address(city: str, state: str, cep_prefix: str = "01") -> Dict[str, str]:
+def generate_address(
+    city: str,
+    state: str,
+    cep_prefix: str = "01",
+    rng: random.Random = random
+) -> Dict[str, str]:
     """Generate a realistic Brazilian address with proper CEP for the city"""
-    prefix = random.choice(STREET_PREFIXES)
-    name = random.choice(STREET_NAMES)
-    number = random.randint(1, 999)
-    neighborhood = random.choice(["Centro", "Vila Nova", "Jardim das Flores", "Bairro Alto", "Zona Sul"])
+    prefix = rng.choice(STREET_PREFIXES)
+    name = rng.choice(STREET_NAMES)
+    number = rng.randint(1, 999)
+    neighborhood = rng.choice(NEIGHBORHOODS)
     # Use city-specific CEP prefix + 3 random digits + hyphen + 3 more digits
-    cep = f"{cep_prefix}{random.randint(0, 999):03d}-{random.randint(0, 999):03d}"
+    cep = f"{cep_prefix}{rng.randint(0, 999):03d}-{rng.randint(0, 999):03d}"
     
     return {
         "street": f"{prefix} {name}, {number}",
@@ -157,13 +203,13 @@ def generate_address(city: str, state: str, cep_prefix: str = "01") -> Dict[str,
     }
 
 
-def add_random_offset(lat: float, lng: float, max_km: float = 5.0) -> tuple:
+def add_random_offset(lat: float, lng: float, max_km: float = 5.0, rng: random.Random = random) -> tuple:
     """Add random offset to coordinates (approximately in km)"""
     # Rough conversion: 1 degree ≈ 111 km
     km_to_deg = 1 / 111.0
     
-    offset_lat = random.uniform(-max_km * km_to_deg, max_km * km_to_deg)
-    offset_lng = random.uniform(-max_km * km_to_deg, max_km * km_to_deg)
+    offset_lat = rng.uniform(-max_km * km_to_deg, max_km * km_to_deg)
+    offset_lng = rng.uniform(-max_km * km_to_deg, max_km * km_to_deg)
     
     return (round(lat + offset_lat, 6), round(lng + offset_lng, 6))
 
@@ -172,20 +218,42 @@ def generate_mock_competitors(
     city: str,
     category: str,
     count: int = 10,
-    radius_km: float = 5.0
+    radius_km: float = 5.0,
+    seed: int = MOCK_DATA_SEED
 ) -> List[Dict]:
     """
     Generate mock competitor data for a specific city and business category
     
+    Output is deterministic for a given (seed, city, category), and records
+    are drawn one after another from the same stream, so a smaller count
+    yields the same competitors as the first records of a larger one.
+    
     Args:
         city: City name (must be in CITIES dict)
         category: Business category (must be in BUSINESS_CATEGORIES dict)
         count: Number of competitors to generate
         radius_km: Maximum distance from city center in km
+        seed: Base seed, combined with city and category
     
     Returns:
         List of competitor dictionaries
     """
+    competitors = _generate_records(city, category, count, radius_km, seed)
+    
+    # Sort by rating descending
+    competitors.sort(key=lambda x: x["rating"], reverse=True)
+    
+    return competitors
+
+
+def _generate_records(
+    city: str,
+    category: str,
+    count: int,
+    radius_km: float = 5.0,
+    seed: int = MOCK_DATA_SEED
+) -> List[Dict]:
+    """Generate mock competitors in generation order (see generate_mock_competitors)"""
     if city not in CITIES:
         raise ValueError(f"Unknown city: {city}")
     if category not in BUSINESS_CATEGORIES:
@@ -193,20 +261,21 @@ def generate_mock_competitors(
     
     city_data = CITIES[city]
     category_data = BUSINESS_CATEGORIES[category]
+    rng = random.Random(market_seed(city, category, seed))
     competitors = []
     
     for i in range(count):
         # Generate random coordinates within radius
-        lat, lng = add_random_offset(city_data["lat"], city_data["lng"], radius_km)
+        lat, lng = add_random_offset(city_data["lat"], city_data["lng"], radius_km, rng)
         
         # Generate business name
-        name_template = random.choice(category_data["names"])
-        location_name = random.choice(["Central", "Norte", "Sul", "Leste", "Oeste", city])
+        name_template = rng.choice(category_data["names"])
+        location_name = rng.choice(LOCATION_NAMES + [city])
         business_name = name_template.format(location_name)
         
         # Random rating and reviews
-        rating = round(random.uniform(3.5, 5.0), 1)
-        review_count = random.randint(10, 500)
+        rating = round(rng.uniform(3.5, 5.0), 1)
+        review_count = rng.randint(10, 500)
         
         # Social media presence (more established businesses have better presence)
         if rating >= 4.5 and review_count > 200:
@@ -217,25 +286,15 @@ def generate_mock_competitors(
             social_tier = "low"
         
         social_data = SOCIAL_MEDIA[social_tier].copy()
-        social_data["instagram_followers"] = random.randint(
-            *{"high": (5000, 50000), "medium": (500, 5000), "low": (0, 500)}[social_tier]
-        )
+        social_data["instagram_followers"] = rng.randint(*social_data["instagram_followers"])
+        social_data["facebook_likes"] = rng.randint(*social_data["facebook_likes"])
         
         # Estimate revenue based on various factors
         # This is a simplified model - in reality would be much more complex
-        base_revenue = {
-            "Padaria": 30000,
-            "Restaurante": 50000,
-            "Farmácia": 80000,
-            "Supermercado": 150000,
-            "Cafeteria": 25000,
-            "Academia": 40000,
-            "Pet Shop": 35000,
-            "Lanchonete": 20000
-        }.get(category, 30000)
+        base_revenue = BASE_REVENUE.get(category, 30000)
         
         # Multiply by rating factor, review factor, and add randomness
-        revenue_factor = (rating / 5.0) * (1 + review_count / 1000) * random.uniform(0.7, 1.5)
+        revenue_factor = (rating / 5.0) * (1 + review_count / 1000) * rng.uniform(0.7, 1.5)
         estimated_monthly_revenue = int(base_revenue * revenue_factor)
         
         competitor = {
@@ -244,43 +303,111 @@ def generate_mock_competitors(
             "category": category,
             "cnae_code": category_data["cnae"],
             "cnae_description": category_data["description"],
-            "cnpj": generate_cnpj(),
+            "cnpj": generate_cnpj(rng),
             "coordinates": {
                 "latitude": lat,
                 "longitude": lng
             },
-            "address": generate_address(city, city_data["state"], city_data.get("cep_prefix", "01")),
-            "phone": generate_phone(),
+            "address": generate_address(city, city_data["state"], city_data.get("cep_prefix", "01"), rng),
+            "phone": generate_phone(rng),
             "rating": rating,
             "review_count": review_count,
             "online_presence": social_data,
-            "is_verified": random.choice([True, True, True, False]),  # 75% verified
-            "opening_year": random.randint(2010, 2024),
-            "employee_count_estimate": random.choice([
-                "1-5", "1-5", "6-10", "6-10", "11-25", "26-50", "50+"
-            ]),
+            "is_verified": rng.choice([True, True, True, False]),  # 75% verified
+            "opening_year": rng.randint(2010, 2024),
+            "employee_count_estimate": rng.choice(EMPLOYEE_COUNT_BUCKETS),
             "estimated_monthly_revenue": estimated_monthly_revenue,
-            "has_delivery": random.choice([True, False]),
-            "accepts_pix": random.choice([True, True, True, False]),  # 75% accept PIX
-            "accepts_cards": random.choice([True, True, True, True, False]),  # 80% accept cards
+            "has_delivery": rng.choice([True, False]),
+            "accepts_pix": rng.choice([True, True, True, False]),  # 75% accept PIX
+            "accepts_cards": rng.choice([True, True, True, True, False]),  # 80% accept cards
         }
         
         competitors.append(competitor)
     
-    # Sort by rating descending
-    competitors.sort(key=lambda x: x["rating"], reverse=True)
-    
     return competitors
 
 
-# Pre-generated datasets for quick access
-MOCK_DATA_CACHE = {}
+def _deep_sizeof(value) -> int:
+    """Approximate memory footprint of nested dicts/lists of scalars"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_sizeof(v) for v in value)
+    return size
+
+
+class MockDataset:
+    """
+    Cached mock competitors for one (city, category), up to some count
+
+    records are sorted by rating (like generate_mock_competitors) and
+    positions[i] is the generation index of records[i]. Because generation
+    is deterministic and sequential, the dataset for a smaller count is
+    exactly the records whose position is below that count, in the same
+    order, so one dataset (the largest requested so far) serves every
+    count up to its own.
+
+    search_state holds what the search builds over the records (market
+    columns, spatial index); it lives and is evicted with the dataset.
+    """
+
+    def __init__(self, records: List[Dict], positions: List[int]):
+        self.records = records
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.size = _deep_sizeof(records) + self.positions.nbytes
+        self.search_state: Any = None
+
+    @classmethod
+    def generate(cls, city: str, category: str, count: int) -> "MockDataset":
+        generated = _generate_records(city, category, count)
+        # Stable sort, so ties keep generation order as in generate_mock_competitors
+        positions = sorted(range(count), key=lambda i: generated[i]["rating"], reverse=True)
+        return cls([generated[i] for i in positions], positions)
+
+    def subset(self, count: int) -> List[Dict]:
+        """Records of the dataset for a smaller count"""
+        return [r for r, p in zip(self.records, self.positions.tolist()) if p < count]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+# Pre-generated datasets, keyed by (city, category); each entry is charged
+# for its records plus its search state
+MOCK_DATA_CACHE = LRUCache(max_size=MOCK_DATA_CACHE_MAX_BYTES)
+
+
+def get_mock_dataset(city: str, category: str, count: int = 10) -> MockDataset:
+    """
+    Cached dataset for a city/category with at least count records
+
+    A request for more records than cached replaces the entry with a
+    larger dataset; smaller counts are served from it (see subset and
+    the positions filter in the search).
+    """
+    cache_key = (city, category)
+    dataset = MOCK_DATA_CACHE.get(cache_key)
+    if dataset is None or len(dataset) < count:
+        dataset = MockDataset.generate(city, category, count)
+        MOCK_DATA_CACHE.put(cache_key, dataset, size=dataset.size)
+    return dataset
+
+
+def attach_search_state(city: str, category: str, dataset: MockDataset, state: Any, size: int) -> None:
+    """Store search state on a dataset and charge its size to the cache entry"""
+    dataset.search_state = state
+    dataset.size += size
+    if MOCK_DATA_CACHE.peek((city, category)) is dataset:
+        MOCK_DATA_CACHE.put((city, category), dataset, size=dataset.size)
+
 
 def get_mock_competitors(city: str, category: str, count: int = 10) -> List[Dict]:
-    """Get mock competitors with caching"""
-    cache_key = f"{city}_{category}_{count}"
-    
-    if cache_key not in MOCK_DATA_CACHE:
-        MOCK_DATA_CACHE[cache_key] = generate_mock_competitors(city, category, count)
-    
-    return MOCK_DATA_CACHE[cache_key]
+    """Get mock competitors with caching (see get_mock_dataset)"""
+    dataset = get_mock_dataset(city, category, count)
+    return dataset.records if len(dataset) == count else dataset.subset(count)
+
+
+def mock_cache_stats() -> Dict:
+    """Hit/miss/size counters of the mock data cache"""
+    return MOCK_DATA_CACHE.stats()
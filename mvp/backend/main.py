@@ -2,10 +2,13 @@
 CompeteIntel API - Brazilian Competitor Intelligence Platform
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import ValidationError
+import asyncio
+import logging
 import os
+import secrets
 from typing import Optional
 from sqlalchemy.orm import Session
 
@@ -14,20 +17,49 @@ from models.schemas import (
     CompetitorSearchResponse,
     HealthResponse,
     DemoRequestCreate,
-    DemoRequestResponse
+    DemoRequestResponse,
+    DigestRequest
 )
-from models.database import init_db, get_db
-from services.competitor_service import search_competitors
-from services.analysis_service import generate_analytics
+from models.database import init_db, get_session, USE_ASYNC_DB, engine, async_engine, DemoRequestStatus
+from models.db_pool import pool_status
+from data.competitor_store import load_competitor_store
+from data.mock_competitors import BUSINESS_CATEGORIES, CITIES
+from services.search_pipeline import execute_search_pipeline
+from services.executor import pipeline_executor, ExecutorSaturated
+from data.mock_competitors import mock_cache_stats
 from services.cnpj_service import validate_cnpj, format_cnpj, lookup_cnpj
-from services.demo_service import process_demo_request, get_demo_request
+from services.demo_service import (
+    store_demo_request,
+    store_demo_request_async,
+    enqueue_demo_request,
+    demo_job_queue,
+    get_demo_request,
+    get_demo_request_async,
+    list_demo_requests_page,
+    list_demo_requests_page_async,
+    resolve_fields,
+    InvalidCursor
+)
+from services.http_cache import PrecomputedJSON, etag_matches, not_modified
+from services.analysis_cache import analysis_cache_stats
+from services.smtp_sender import smtp_sender
+from services.email_outbox import outbox_dispatcher
+from services.email_service import EMAIL_RENDER_CACHE, email_log_stats
+from services.mail_sink import mail_sink
+from services.digest_service import digest_runs, digest_stats, start_digest, stop_digests
+from services.singleflight import singleflight_stats
+
+logger = logging.getLogger(__name__)
 
 # Environment configuration
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 USE_MOCK_DATA = os.getenv("USE_MOCK_DATA", "true").lower() == "true"
 API_TITLE = os.getenv("API_TITLE", "CompeteIntel API")
 API_VERSION = os.getenv("API_VERSION", "1.0.0")
+METADATA_CACHE_MAX_AGE = int(os.getenv("METADATA_CACHE_MAX_AGE", "300"))
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:3001,http://localhost:8080,http://localhost:8081").split(",")
+# Shared secret for /api/admin endpoints (sent as X-Admin-Token); unset disables them
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -49,11 +81,42 @@ app.add_middleware(
 )
 
 
-# Database initialization
+# Database initialization, and the competitor store (memory-mapped, only
+# when COMPETITOR_STORE_PATH is set). Both must be ready before the job
+# queue starts: its recovery pass runs searches right away.
 @app.on_event("startup")
 def startup_db():
-    """Initialize database on startup"""
+    """Initialize database and open the columnar competitor store on startup"""
     init_db()
+    load_competitor_store()
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    """Stop search/analytics worker pools"""
+    pipeline_executor.shutdown()
+
+
+# Background jobs for demo requests
+@app.on_event("startup")
+async def startup_job_queue():
+    """Start demo request workers (which also pick up requests left unfinished), the mail sink and the email outbox"""
+    await demo_job_queue.start()
+    await mail_sink.start()
+    await outbox_dispatcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_job_queue():
+    """Stop demo request workers, the email outbox and the mail sink, and close pooled SMTP and database connections"""
+    await demo_job_queue.stop()
+    await stop_digests()
+    await outbox_dispatcher.stop()
+    await mail_sink.stop()
+    await smtp_sender.close()
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
 
 
 @app.get("/", tags=["Health"])
@@ -80,6 +143,28 @@ async def health_check():
     )
 
 
+@app.get("/api/metrics", tags=["Health"])
+async def get_metrics():
+    """Runtime metrics: search executor stages, database pools and in-process caches"""
+    return {
+        "search_executor": pipeline_executor.stats(),
+        "singleflight": singleflight_stats(),
+        "demo_jobs": demo_job_queue.stats(),
+        "analysis_cache": analysis_cache_stats(),
+        "email_outbox": outbox_dispatcher.stats(),
+        "email_render_cache": EMAIL_RENDER_CACHE.stats(),
+        "email_log": email_log_stats(),
+        "mail_sink": mail_sink.stats(),
+        "digests": digest_stats(),
+        "smtp": smtp_sender.stats(),
+        "db_pool": {
+            "sync": pool_status(engine),
+            "async": pool_status(async_engine.sync_engine) if async_engine is not None else None
+        },
+        "mock_data_cache": mock_cache_stats()
+    }
+
+
 @app.post("/api/search", response_model=CompetitorSearchResponse, tags=["Competitors"])
 async def search_competitor_analysis(request: CompetitorSearchRequest):
     """
@@ -104,52 +189,47 @@ async def search_competitor_analysis(request: CompetitorSearchRequest):
     }
     ```
     """
+    # Note: For now, we don't have "your business" data
+    # In a full implementation, this would come from user's profile or be included in request
+    your_business = None
+    if request.business_name:
+        # Mock "your business" data for demonstration
+        # In production, this would come from the database or be part of the request
+        your_business = {
+            "name": request.business_name,
+            "rating": 4.2,
+            "review_count": 87,
+            "online_presence": {
+                "has_website": False,
+                "has_instagram": True,
+                "has_facebook": True,
+                "instagram_followers": 1500,
+                "facebook_likes": 800
+            },
+            "estimated_monthly_revenue": 45000,
+            "has_delivery": True,
+            "accepts_pix": True
+        }
+    
     try:
-        # Search for competitors
-        competitors = search_competitors(
+        # Search for competitors and generate analytics off the event loop
+        # Note: Empty results are valid - filters might be too restrictive
+        # Don't raise 404, just return empty list with message in analytics
+        competitors, analytics, timings = await execute_search_pipeline(
             category=request.category.value,
             city=request.city,
-            coordinates=request.coordinates,
+            coordinates=request.coordinates.model_dump() if request.coordinates else None,
             radius_km=request.radius_km,
             max_results=request.max_results,
             neighborhood=request.neighborhood,
-            cep=request.cep
-        )
-        
-        # Note: Empty results are valid - filters might be too restrictive
-        # Don't raise 404, just return empty list with message in analytics
-        
-        # Generate analytics
-        # Note: For now, we don't have "your business" data
-        # In a full implementation, this would come from user's profile or be included in request
-        your_business = None
-        if request.business_name:
-            # Mock "your business" data for demonstration
-            # In production, this would come from the database or be part of the request
-            your_business = {
-                "name": request.business_name,
-                "rating": 4.2,
-                "review_count": 87,
-                "online_presence": {
-                    "has_website": False,
-                    "has_instagram": True,
-                    "has_facebook": True,
-                    "instagram_followers": 1500,
-                    "facebook_likes": 800
-                },
-                "estimated_monthly_revenue": 45000,
-                "has_delivery": True,
-                "accepts_pix": True
-            }
-        
-        analytics = generate_analytics(
-            competitors=competitors,
-            radius_km=request.radius_km,
+            cep=request.cep,
             your_business=your_business
         )
         
         # Build response
-        response = CompetitorSearchResponse(
+        # Every part is already a validated/trusted model: construct without
+        # re-validation and serialize once, bypassing response_model checks
+        response = CompetitorSearchResponse.model_construct(
             query=request,
             competitors=competitors,
             analytics=analytics,
@@ -157,8 +237,19 @@ async def search_competitor_analysis(request: CompetitorSearchRequest):
             search_radius_km=request.radius_km
         )
         
-        return response
+        server_timing = ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
+        return Response(
+            content=response.model_dump_json(),
+            media_type="application/json",
+            headers={"Server-Timing": server_timing}
+        )
         
+    except ExecutorSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado. Tente novamente em alguns instantes.",
+            headers={"Retry-After": "1"}
+        )
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
@@ -194,11 +285,8 @@ async def get_cnpj_info(cnpj: str):
     return cnpj_data
 
 
-@app.get("/api/categories", tags=["Metadata"])
-async def get_categories():
-    """Get list of supported business categories"""
-    from data.mock_competitors import BUSINESS_CATEGORIES
-    
+def _build_categories_payload() -> dict:
+    """Supported business categories, as served by /api/categories"""
     categories = []
     for name, data in BUSINESS_CATEGORIES.items():
         categories.append({
@@ -210,11 +298,8 @@ async def get_categories():
     return {"categories": categories}
 
 
-@app.get("/api/cities", tags=["Metadata"])
-async def get_cities():
-    """Get list of supported cities"""
-    from data.mock_competitors import CITIES
-    
+def _build_cities_payload() -> dict:
+    """Supported cities, as served by /api/cities"""
     cities = []
     for name, data in CITIES.items():
         cities.append({
@@ -229,16 +314,32 @@ async def get_cities():
     return {"cities": cities}
 
 
-@app.post("/api/demo-request", response_model=DemoRequestResponse, tags=["Demo"])
-async def create_demo_request(request: DemoRequestCreate, db: Session = Depends(get_db)):
+# Metadata only changes on deploy: encode once, serve bytes + ETag
+CATEGORIES_RESPONSE = PrecomputedJSON(_build_categories_payload(), max_age=METADATA_CACHE_MAX_AGE)
+CITIES_RESPONSE = PrecomputedJSON(_build_cities_payload(), max_age=METADATA_CACHE_MAX_AGE)
+
+
+@app.get("/api/categories", tags=["Metadata"])
+async def get_categories(http_request: Request):
+    """Get list of supported business categories"""
+    return CATEGORIES_RESPONSE.response(http_request)
+
+
+@app.get("/api/cities", tags=["Metadata"])
+async def get_cities(http_request: Request):
+    """Get list of supported cities"""
+    return CITIES_RESPONSE.response(http_request)
+
+
+@app.post("/api/demo-request", response_model=DemoRequestResponse, status_code=202, tags=["Demo"])
+async def create_demo_request(request: DemoRequestCreate, db: Session = Depends(get_session)):
     """
     Create a demo request from the landing page
     
     This endpoint:
     1. Stores the demo request in the database
-    2. Triggers a competitor analysis
-    3. Sends the analysis results via email
-    4. Returns the request status
+    2. Queues the competitor analysis and email as a background job
+    3. Returns 202 with the request id; poll GET /api/demo-request/{id}
     
     **Example Request:**
     ```json
@@ -251,12 +352,11 @@ async def create_demo_request(request: DemoRequestCreate, db: Session = Depends(
     }
     ```
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     try:
-        response = await process_demo_request(request, db)
-        return response
+        if USE_ASYNC_DB:
+            response = await store_demo_request_async(request, db)
+        else:
+            response = await asyncio.to_thread(store_demo_request, request, db)
     except Exception as e:
         # Log the full error for debugging (visible in Cloud Run logs)
         logger.error(f"Error processing demo request for {request.email}: {str(e)}", exc_info=True)
@@ -266,26 +366,124 @@ async def create_demo_request(request: DemoRequestCreate, db: Session = Depends(
             status_code=500,
             detail="Desculpe, ocorreu um erro temporário. Por favor, tente novamente em alguns instantes. Se o problema persistir, entre em contato conosco."
         )
+    
+    enqueue_demo_request(response.id)
+    return response
 
 
 @app.get("/api/demo-request/{request_id}", tags=["Demo"])
-async def get_demo_request_status(request_id: str, db: Session = Depends(get_db)):
+async def get_demo_request_status(
+    request_id: str,
+    http_request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    include_results: bool = True,
+    db: Session = Depends(get_session)
+):
     """
     Get the status and results of a demo request
     
-    **Example:** /api/demo-request/123e4567-e89b-12d3-a456-426614174000
+    Includes "progress" (current stage, attempts, last error) while the
+    background job is handled by this instance.
+    
+    Status polls should ask only for what they show, e.g.
+    ?fields=status,progress (or ?exclude=analysis_results), and send the
+    last ETag in If-None-Match to get 304 while nothing changed.
+    include_results=false is the same as exclude=analysis_results.
+    
+    **Example:** /api/demo-request/123e4567-e89b-12d3-a456-426614174000?fields=status,progress
     """
-    result = get_demo_request(request_id, db)
+    try:
+        selected = resolve_fields(fields, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not include_results:
+        selected = selected - {"analysis_results"}
+    
+    def matches(etag: str) -> bool:
+        return etag_matches(http_request, etag)
     
-    if not result:
+    if USE_ASYNC_DB:
+        found = await get_demo_request_async(request_id, db, selected, matches)
+    else:
+        found = await asyncio.to_thread(get_demo_request, request_id, db, selected, matches)
+    
+    if not found:
         raise HTTPException(
             status_code=404,
             detail="Solicitação não encontrada."
         )
     
+    etag, result = found
+    headers = {"Cache-Control": "no-cache"}
+    if result is None:
+        return not_modified(etag, headers)
+    
+    response.headers["ETag"] = etag
+    response.headers.update(headers)
     return result
 
 
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Allow the request only with X-Admin-Token equal to ADMIN_API_TOKEN"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/api/admin/demo-requests", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+async def list_demo_requests_admin(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[DemoRequestStatus] = None,
+    email: Optional[str] = None,
+    db: Session = Depends(get_session)
+):
+    """
+    List demo requests, newest first (requires the X-Admin-Token header)
+    
+    Pass the returned next_cursor to get the following page; it is null
+    on the last page.
+    
+    **Example:** /api/admin/demo-requests?status=failed&limit=20
+    """
+    try:
+        if USE_ASYNC_DB:
+            return await list_demo_requests_page_async(db, limit, cursor, status, email)
+        return await asyncio.to_thread(list_demo_requests_page, db, limit, cursor, status, email)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/admin/digest", status_code=202, tags=["Admin"], dependencies=[Depends(require_admin_token)])
+async def start_digest_admin(request: DigestRequest):
+    """
+    Send the market digest to a list of subscribers (requires the X-Admin-Token header)
+    
+    Runs in the background: each market is analyzed once, then one email
+    per subscriber is queued in the email outbox, which delivers it.
+    Subscribers already sent this campaign's digest (default: today's
+    UTC date) are not emailed again. Poll GET /api/admin/digest/{run_id}
+    for progress.
+    """
+    run = start_digest(
+        (subscriber.model_dump(mode="json") for subscriber in request.subscribers),
+        request.campaign
+    )
+    return run.stats()
+
+
+@app.get("/api/admin/digest/{run_id}", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+async def get_digest_admin(run_id: str):
+    """Progress and throughput of a digest run (requires the X-Admin-Token header)"""
+    run = digest_runs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Digest run not found")
+    return run.stats()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -2,15 +2,20 @@
 SQLAlchemy database models and connection setup
 """
 
-from sqlalchemy import create_engine, Column, String, DateTime, JSON, Enum as SQLEnum
+from sqlalchemy import create_engine, inspect, text, Column, String, DateTime, Integer, LargeBinary, JSON, Index, Enum as SQLEnum
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, deferred
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from datetime import datetime
+import asyncio
 import os
 import enum
 import uuid
 import logging
 
+from models.db_pool import pool_options, instrument_pool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,12 +36,44 @@ if '@' in DATABASE_URL:
 else:
     logger.warning("DATABASE_URL format unexpected")
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=True if os.getenv("ENVIRONMENT") == "development" else False)
+# Use the async engine/sessions for request handling and background jobs
+USE_ASYNC_DB = os.getenv("DATABASE_ASYNC", "false").lower() == "true"
+
+ECHO_SQL = True if os.getenv("ENVIRONMENT") == "development" else False
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL to its async driver (already-async URLs pass through)"""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+# Create engine (always available: table creation, scripts, sync sessions)
+engine = create_engine(DATABASE_URL, echo=ECHO_SQL, **pool_options(DATABASE_URL))
+instrument_pool(engine)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory, only when enabled
+async_engine = (
+    create_async_engine(to_async_url(DATABASE_URL), echo=ECHO_SQL, **pool_options(DATABASE_URL, use_async=True))
+    if USE_ASYNC_DB else None
+)
+if async_engine is not None:
+    instrument_pool(async_engine.sync_engine)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if USE_ASYNC_DB else None
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -49,6 +86,14 @@ class DemoRequestStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class EmailOutboxStatus(str, enum.Enum):
+    """Delivery state of an outbox email"""
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+
 class DemoRequest(Base):
     """Demo request model - stores requests from landing page"""
     __tablename__ = "demo_requests"
@@ -62,13 +107,87 @@ class DemoRequest(Base):
     status = Column(SQLEnum(DemoRequestStatus), nullable=False, default=DemoRequestStatus.PENDING)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
-    analysis_results = Column(JSON, nullable=True)
+    # sha256 of the stored results (row in analysis_results)
+    analysis_hash = Column(String(64), nullable=True)
+    # Legacy inline results, written before analysis_results existed;
+    # deferred so status reads never pull it
+    analysis_results = deferred(Column(JSON, nullable=True))
     error_message = Column(String, nullable=True)
 
+    # Each index ends in (created_at, id) so filtered admin listings can
+    # seek to a keyset cursor instead of scanning and sorting
+    __table_args__ = (
+        Index("ix_demo_requests_created_at_id", "created_at", "id"),
+        Index("ix_demo_requests_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_demo_requests_email_created_at_id", "email", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<DemoRequest(id={self.id}, business_name={self.business_name}, email={self.email}, status={self.status})>"
 
 
+class AnalysisResult(Base):
+    """Analysis results, compressed and stored once per distinct content"""
+    __tablename__ = "analysis_results"
+
+    hash = Column(String(64), primary_key=True)
+    # Payload format, e.g. "zlib+json"
+    encoding = Column(String(16), nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    # Uncompressed JSON size in bytes
+    raw_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AnalysisResult(hash={self.hash}, encoding={self.encoding}, raw_size={self.raw_size})>"
+
+
+class AnalysisCacheEntry(Base):
+    """Analysis to reuse for a normalized (city, state, category) until expires_at"""
+    __tablename__ = "analysis_cache"
+
+    # sha256 of the normalized inputs (see services.analysis_cache)
+    key = Column(String(64), primary_key=True)
+    city = Column(String, nullable=False)
+    state = Column(String, nullable=True)
+    category = Column(String, nullable=False)
+    analysis_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<AnalysisCacheEntry(city={self.city}, category={self.category}, analysis_hash={self.analysis_hash})>"
+
+
+class EmailOutbox(Base):
+    """Email waiting for (or done with) delivery by the outbox dispatcher"""
+    __tablename__ = "email_outbox"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    # One row per logical email (e.g. "demo-analysis:<request id>"); a
+    # repeated enqueue is a no-op
+    idempotency_key = Column(String, nullable=False, unique=True)
+    kind = Column(String, nullable=False)
+    to_email = Column(String, nullable=False)
+    # Render inputs (small; analysis results are referenced by hash)
+    payload = Column(JSON, nullable=False)
+    status = Column(SQLEnum(EmailOutboxStatus), nullable=False, default=EmailOutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Claim lease: a SENDING row past this is reclaimed (dispatcher died)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, kind={self.kind}, to_email={self.to_email}, status={self.status})>"
+
+
 # Database dependency for FastAPI
 def get_db():
     """Get database session"""
@@ -79,7 +198,105 @@ def get_db():
         db.close()
 
 
+# Async database dependency for FastAPI
+async def get_async_db():
+    """Get async database session (requires DATABASE_ASYNC=true)"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database is disabled. Set DATABASE_ASYNC=true")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Session dependency matching the configured mode
+get_session = get_async_db if USE_ASYNC_DB else get_db
+
+
+async def run_in_session(fn, *args):
+    """
+    Run fn(session, *args) with a new sync-style Session, off the event loop
+
+    Uses AsyncSession.run_sync when DATABASE_ASYNC=true, otherwise a
+    SessionLocal on a worker thread, so one sync implementation serves
+    both modes. fn commits its own writes.
+    """
+    if USE_ASYNC_DB:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args)
+
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    return await asyncio.to_thread(call)
+
+
+# Arbitrary key of the PostgreSQL advisory lock held while init_db changes the schema
+SCHEMA_LOCK_ID = 728_311_004
+
+
 # Initialize database tables
 def init_db():
-    """Create all tables"""
-    Base.metadata.create_all(bind=engine)
+    """
+    Create all tables, plus columns and indexes added after a table was created
+
+    Instances starting together take turns: on PostgreSQL the changes run
+    under a session advisory lock, and on any database a table, column or
+    index that another process created first counts as done.
+    """
+    with engine.connect() as connection:
+        locked = engine.dialect.name == "postgresql"
+        if locked:
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": SCHEMA_LOCK_ID})
+            connection.commit()
+        try:
+            _create_if_missing(connection, lambda: Base.metadata.create_all(bind=connection), "tables")
+            _add_missing_columns(connection)
+            # create_all skips indexes of tables that already exist
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    _create_if_missing(connection, lambda: index.create(bind=connection, checkfirst=True), f"index {index.name}")
+        finally:
+            if locked:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEMA_LOCK_ID})
+                connection.commit()
+
+
+def _create_if_missing(connection, create, what: str) -> bool:
+    """Run and commit one schema change; False if another process made it first"""
+    try:
+        create()
+        connection.commit()
+        return True
+    except (OperationalError, ProgrammingError) as e:
+        connection.rollback()
+        message = str(e.orig).lower()
+        if "already exists" not in message and "duplicate column" not in message:
+            raise
+        logger.info("Skipped %s: created by another process", what)
+        return False
+
+
+def _add_missing_columns(connection):
+    """
+    ALTER TABLE ... ADD COLUMN for nullable model columns the table lacks
+
+    create_all never alters existing tables and there are no migrations,
+    so new nullable columns are added here.
+    """
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            added = _create_if_missing(
+                connection,
+                lambda: connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')),
+                f"column {table.name}.{column.name}"
+            )
+            if added:
+                logger.info("Added column %s.%s", table.name, column.name)
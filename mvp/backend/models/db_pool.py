@@ -0,0 +1,157 @@
+"""
+Database connection pool configuration and metrics
+
+Pool sizing comes from the environment so each Cloud Run instance can be
+kept within the Postgres connection budget:
+    max connections per instance = DB_POOL_SIZE + DB_MAX_OVERFLOW
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+# Seconds to wait for a free connection before raising TimeoutError
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycle connections older than this (seconds), before server/proxy idle timeouts
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections on checkout and transparently replace dead ones
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+class PoolStats:
+    """Checkout, wait time and invalidation counters for one pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def record_wait(self, ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_total_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        waits = self.checkouts + self.timeouts
+        return {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "overflow_checkouts": self.overflow_checkouts,
+            "invalidations": self.invalidations,
+            "soft_invalidations": self.soft_invalidations,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total_ms / waits, 3) if waits else 0.0,
+            "wait_max_ms": round(self.wait_max_ms, 3),
+        }
+
+
+class _TimedCheckout:
+    """Times _do_get, the step that blocks when the pool is exhausted"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception as e:
+            self.stats.record_wait((time.perf_counter() - started) * 1000, timed_out=isinstance(e, PoolTimeout))
+            raise
+        self.stats.record_wait((time.perf_counter() - started) * 1000)
+        # Served while connections beyond pool_size are open
+        if self.overflow() > 0:
+            self.stats.increment("overflow_checkouts")
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _uses_static_pool(url: str) -> bool:
+    """In-memory SQLite keeps a single connection; pool sizing does not apply"""
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+def pool_options(url: str, use_async: bool = False) -> Dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments for the pool"""
+    if _uses_static_pool(url):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument_pool(engine: Engine) -> PoolStats:
+    """
+    Attach PoolStats to an engine's pool via pool events
+
+    Pass engine.sync_engine for an AsyncEngine.
+    """
+    stats = getattr(engine.pool, "stats", None) or PoolStats()
+    engine.pool.stats = stats
+
+    event.listen(engine, "connect", lambda *_: stats.increment("connects"))
+    event.listen(engine, "checkout", lambda *_: stats.increment("checkouts"))
+    event.listen(engine, "checkin", lambda *_: stats.increment("checkins"))
+    event.listen(engine, "invalidate", lambda *_: stats.increment("invalidations"))
+    event.listen(engine, "soft_invalidate", lambda *_: stats.increment("soft_invalidations"))
+    return stats
+
+
+def pool_status(engine: Optional[Engine]) -> Optional[Dict[str, Any]]:
+    """Current occupancy plus cumulative counters of an engine's pool"""
+    if engine is None:
+        return None
+    pool = engine.pool
+    status: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.to_dict())
+    return status
@@ -205,6 +205,22 @@ class DemoRequestCreate(BaseModel):
         }
 
 
+class DigestSubscriber(BaseModel):
+    """A business receiving the market digest"""
+    business_name: str = Field(..., min_length=2, max_length=200)
+    email: EmailStr
+    city: str = Field(..., min_length=2, max_length=100)
+    state: Optional[str] = Field(None, min_length=2, max_length=2)
+    category: BusinessCategory
+
+
+class DigestRequest(BaseModel):
+    """Request model for starting a digest send"""
+    subscribers: List[DigestSubscriber] = Field(..., min_length=1)
+    # Emails are sent once per campaign; defaults to the UTC date
+    campaign: Optional[str] = Field(None, min_length=1, max_length=64)
+
+
 class DemoRequestResponse(BaseModel):
     """Response model for demo request"""
     id: str
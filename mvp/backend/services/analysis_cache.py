@@ -0,0 +1,88 @@
+"""
+Content-addressed cache of demo analyses
+
+A demo analysis depends only on the market (city, state, category) and
+the fixed demo search parameters, so requests for the same market within
+ANALYSIS_CACHE_TTL_MINUTES reuse one stored result: the cache entry maps
+the hash of the normalized inputs to an analysis_results hash, and every
+DemoRequest served from it points at that same row.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.database import AnalysisCacheEntry, AnalysisResult, engine
+from services.competitor_service import USE_MOCK_DATA, normalize_city, normalize_category
+
+# How long a market's analysis is reused; 0 disables the cache
+ANALYSIS_CACHE_TTL_MINUTES = int(os.getenv("ANALYSIS_CACHE_TTL_MINUTES", "360"))
+
+# Bump when the analysis output format changes to stop reusing old entries
+ANALYSIS_CACHE_VERSION = 1
+
+analysis_cache_counters = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def normalize_inputs(city: str, state: Optional[str], category: str) -> Dict[str, str]:
+    """
+    Canonical market for cache keys
+
+    With mock data, city and category resolve to the same keys the search
+    uses, so spellings that search the same market share an entry.
+    """
+    if USE_MOCK_DATA:
+        city, category = normalize_city(city), normalize_category(category)
+    else:
+        city, category = " ".join(city.split()).casefold(), " ".join(category.split()).casefold()
+    return {"city": city, "state": (state or "").strip().upper(), "category": category}
+
+
+def cache_key(inputs: Dict[str, str], **params: Any) -> str:
+    """sha256 of the normalized market plus the analysis parameters"""
+    material = {"version": ANALYSIS_CACHE_VERSION, **inputs, **params}
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cached_analysis_statement(key: str):
+    """Result hash of a live entry (joined so a missing result counts as a miss)"""
+    return (
+        select(AnalysisCacheEntry.analysis_hash)
+        .join(AnalysisResult, AnalysisResult.hash == AnalysisCacheEntry.analysis_hash)
+        .where(AnalysisCacheEntry.key == key)
+        .where(AnalysisCacheEntry.expires_at > datetime.utcnow())
+    )
+
+
+def cache_entry_statement(key: str, inputs: Dict[str, str], analysis_hash: str):
+    """Insert or refresh the entry for a key"""
+    now = datetime.utcnow()
+    values = {
+        "key": key,
+        **inputs,
+        "analysis_hash": analysis_hash,
+        "created_at": now,
+        "expires_at": now + timedelta(minutes=ANALYSIS_CACHE_TTL_MINUTES)
+    }
+    dialect_insert = postgresql_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    statement = dialect_insert(AnalysisCacheEntry).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=["key"],
+        set_={name: statement.excluded[name] for name in ("analysis_hash", "created_at", "expires_at")}
+    )
+
+
+def analysis_cache_stats() -> Dict[str, Any]:
+    lookups = analysis_cache_counters["hits"] + analysis_cache_counters["misses"]
+    return {
+        "enabled": ANALYSIS_CACHE_TTL_MINUTES > 0,
+        "ttl_minutes": ANALYSIS_CACHE_TTL_MINUTES,
+        **analysis_cache_counters,
+        "hit_ratio": round(analysis_cache_counters["hits"] / lookups, 4) if lookups else 0.0
+    }
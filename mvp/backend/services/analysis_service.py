@@ -2,7 +2,7 @@
 Business analysis service for competitive intelligence
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from models.schemas import (
     Competitor,
     MarketDensityAnalysis,
@@ -12,6 +12,53 @@ from models.schemas import (
     AnalyticsResponse
 )
 import math
+import os
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Average pairwise distance: exact up to this many points, sampled above it
+PAIRWISE_EXACT_MAX_POINTS = int(os.getenv("PAIRWISE_EXACT_MAX_POINTS", "1500"))
+PAIRWISE_SAMPLE_SIZE = int(os.getenv("PAIRWISE_SAMPLE_SIZE", "20000"))
+# Rows per block in the exact path, keeps the distance block around 8 MB
+PAIRWISE_BLOCK_ROWS = 512
+
+
+def haversine_distances(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Vectorized Haversine distance in kilometers
+
+    Accepts scalars or arrays and follows NumPy broadcasting rules, so a
+    single reference point against arrays of coordinates (one-to-many) or
+    two equally shaped arrays (element-wise) are computed in one pass.
+    """
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    lng1 = np.radians(np.asarray(lng1, dtype=np.float64))
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))
+    lng2 = np.radians(np.asarray(lng2, dtype=np.float64))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    # Clip guards against a > 1 from rounding on (near) antipodal points
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lats1, lngs1, lats2=None, lngs2=None) -> np.ndarray:
+    """
+    Many-to-many Haversine distances in kilometers
+
+    Returns an (n, m) matrix where entry [i, j] is the distance between
+    point i of the first set and point j of the second set. When the second
+    set is omitted, the first set is compared against itself.
+    """
+    lats1 = np.asarray(lats1, dtype=np.float64)
+    lngs1 = np.asarray(lngs1, dtype=np.float64)
+    if lats2 is None or lngs2 is None:
+        lats2, lngs2 = lats1, lngs1
+    lats2 = np.asarray(lats2, dtype=np.float64)
+    lngs2 = np.asarray(lngs2, dtype=np.float64)
+
+    return haversine_distances(lats1[:, None], lngs1[:, None], lats2[None, :], lngs2[None, :])
 
 
 def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
@@ -19,17 +66,65 @@ def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> fl
     Calculate distance between two coordinates using Haversine formula
     Returns distance in kilometers
     """
-    R = 6371  # Earth's radius in km
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    dlat = math.radians(lat2 - lat1)
-    dlng = math.radians(lng2 - lng1)
-    
-    a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
-    return R * c
+    return float(haversine_distances(lat1, lng1, lat2, lng2))
+
+
+def average_pairwise_distance(
+    lats,
+    lngs,
+    method: str = "auto",
+    sample_size: int = PAIRWISE_SAMPLE_SIZE,
+    seed: int = 0
+) -> Tuple[float, float]:
+    """
+    Average distance (km) over all unordered pairs of points
+
+    Modes:
+        exact: every pair, computed in row blocks of the distance matrix
+            (O(n²) work, bounded memory). Error bound is 0.
+        sampled: mean over `sample_size` uniformly drawn pairs (i != j).
+            Pairwise distances lie in [0, D], with D the diagonal of the
+            points' bounding box, so by Hoeffding's inequality the estimate
+            is within D * sqrt(ln(2 / 0.05) / (2 * sample_size)) of the exact
+            mean with 95% probability - about 1% of D for 20k samples.
+        auto: exact when n <= PAIRWISE_EXACT_MAX_POINTS, sampled otherwise.
+
+    The sampler is seeded so identical inputs always give identical output.
+
+    Returns:
+        (average distance, 95% error bound), both in km
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    n = len(lats)
+
+    if n < 2:
+        return 0.0, 0.0
+
+    if method == "auto":
+        method = "exact" if n <= PAIRWISE_EXACT_MAX_POINTS else "sampled"
+
+    if method == "exact":
+        total = 0.0
+        for start in range(0, n - 1, PAIRWISE_BLOCK_ROWS):
+            stop = min(start + PAIRWISE_BLOCK_ROWS, n)
+            block = haversine_matrix(lats[start:stop], lngs[start:stop], lats[start:], lngs[start:])
+            # Keep only pairs (i, j) with j > i, local column offset is i - start
+            total += float(np.triu(block, k=1).sum())
+        return total / (n * (n - 1) / 2), 0.0
+
+    if method == "sampled":
+        rng = np.random.default_rng(seed)
+        i = rng.integers(0, n, size=sample_size)
+        # Offset in [1, n-1] guarantees j != i without rejection sampling
+        j = (i + rng.integers(1, n, size=sample_size)) % n
+        estimate = float(haversine_distances(lats[i], lngs[i], lats[j], lngs[j]).mean())
+
+        diameter = calculate_distance(lats.min(), lngs.min(), lats.max(), lngs.max())
+        error_bound = diameter * math.sqrt(math.log(2 / 0.05) / (2 * sample_size))
+        return estimate, error_bound
+
+    raise ValueError(f"Unknown pairwise distance method: {method}")
 
 
 def analyze_market_density(
@@ -57,17 +152,9 @@ def analyze_market_density(
     
     # Calculate average distance between competitors
     if total_competitors > 1:
-        distances = []
-        for i, comp1 in enumerate(competitors):
-            for comp2 in competitors[i+1:]:
-                dist = calculate_distance(
-                    comp1.coordinates.latitude,
-                    comp1.coordinates.longitude,
-                    comp2.coordinates.latitude,
-                    comp2.coordinates.longitude
-                )
-                distances.append(dist)
-        avg_distance = sum(distances) / len(distances) if distances else 0
+        lats = np.fromiter((c.coordinates.latitude for c in competitors), dtype=np.float64, count=total_competitors)
+        lngs = np.fromiter((c.coordinates.longitude for c in competitors), dtype=np.float64, count=total_competitors)
+        avg_distance, _ = average_pairwise_distance(lats, lngs)
     else:
         avg_distance = radius_km * 2  # Approximate if only one or none
     
@@ -0,0 +1,77 @@
+"""
+Storage for demo analysis results
+
+Results live in the analysis_results table as zlib-compressed canonical
+JSON keyed by its sha256, so identical analyses are stored once and
+demo_requests rows stay small (they only carry analysis_hash).
+"""
+
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import AnalysisResult, engine
+
+ENCODING = "zlib+json"
+COMPRESSION_LEVEL = 6
+
+
+def encode_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Row for analysis_results: canonical JSON, its hash and compressed payload
+
+    Keys are sorted so equal results always hash the same.
+    """
+    raw = json.dumps(results, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return {
+        "hash": hashlib.sha256(raw).hexdigest(),
+        "encoding": ENCODING,
+        "payload": zlib.compress(raw, COMPRESSION_LEVEL),
+        "raw_size": len(raw),
+        "created_at": datetime.utcnow()
+    }
+
+
+def decode_results(encoding: str, payload: bytes) -> Dict[str, Any]:
+    if encoding != ENCODING:
+        raise ValueError(f"Unknown analysis encoding: {encoding}")
+    return json.loads(zlib.decompress(payload))
+
+
+def store_statement(row: Dict[str, Any]):
+    """
+    INSERT that is a no-op when the hash is already stored
+
+    ON CONFLICT DO NOTHING (PostgreSQL, SQLite); run it in the same
+    transaction as the UPDATE that points a request at the hash.
+    """
+    dialect_insert = postgresql_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    return dialect_insert(AnalysisResult).values(**row).on_conflict_do_nothing(index_elements=["hash"])
+
+
+def _load_statement(analysis_hash: str):
+    return select(AnalysisResult.encoding, AnalysisResult.payload).where(AnalysisResult.hash == analysis_hash)
+
+
+def load_results(db: Session, analysis_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decoded results for a hash, None if missing"""
+    if not analysis_hash:
+        return None
+    row = db.execute(_load_statement(analysis_hash)).first()
+    return decode_results(row.encoding, row.payload) if row else None
+
+
+async def load_results_async(db: AsyncSession, analysis_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Async version of load_results"""
+    if not analysis_hash:
+        return None
+    row = (await db.execute(_load_statement(analysis_hash))).first()
+    return decode_results(row.encoding, row.payload) if row else None
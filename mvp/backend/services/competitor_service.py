@@ -3,15 +3,52 @@ Competitor discovery service
 Currently uses mock data, ready for Google Places API integration
 """
 
-from typing import List, Optional
+from typing import List, Optional, Dict
 from models.schemas import Competitor, Coordinates, Address, OnlinePresence
-from data.mock_competitors import get_mock_competitors, CITIES, BUSINESS_CATEGORIES
-from services.analysis_service import calculate_distance
+from data.mock_competitors import MockDataset, attach_search_state, get_mock_dataset, CITIES, BUSINESS_CATEGORIES
+from data.competitor_store import get_competitor_store, RecordsMarket
+from services.spatial_index import GridIndex
+import heapq
 import os
 
 
 USE_MOCK_DATA = os.getenv("USE_MOCK_DATA", "true").lower() == "true"
 
+# Mock/store records are generated by us and already well-formed; set to
+# true to run full Pydantic validation on them anyway (e.g. while debugging)
+VALIDATE_INTERNAL_DATA = os.getenv("VALIDATE_INTERNAL_DATA", "false").lower() == "true"
+
+# Spatial indexes of competitor store markets per (city, category), paired
+# with the view they were built from (mock datasets carry their own)
+_STORE_INDEXES = {}
+
+
+def get_spatial_index(city: str, category: str, market) -> GridIndex:
+    """Get the spatial index for a competitor store market, building it on first use"""
+    key = (city, category)
+    cached = _STORE_INDEXES.get(key)
+    if cached is not None and cached[0] is market:
+        return cached[1]
+
+    index = GridIndex(market.lat, market.lng)
+    _STORE_INDEXES[key] = (market, index)
+    return index
+
+
+def mock_search_state(city: str, category: str, dataset: MockDataset):
+    """
+    (RecordsMarket, GridIndex) over a mock dataset, built on first use
+
+    Kept on the dataset, so it is charged to and evicted with the mock
+    data cache entry, and reused for every count the dataset serves.
+    """
+    if dataset.search_state is None:
+        market = RecordsMarket(dataset.records)
+        index = GridIndex(market.lat, market.lng)
+        size = market.nbytes() + index.nbytes()
+        attach_search_state(city, category, dataset, (market, index), size)
+    return dataset.search_state
+
 
 def search_competitors(
     category: str,
@@ -45,18 +82,8 @@ def search_competitors(
         return _search_competitors_google_places(category, city, coordinates, radius_km, max_results)
 
 
-def _search_competitors_mock(
-    category: str,
-    city: str,
-    coordinates: Optional[Coordinates],
-    radius_km: float,
-    max_results: int,
-    neighborhood: Optional[str] = None,
-    cep: Optional[str] = None
-) -> List[Competitor]:
-    """Search using mock data"""
-    
-    # Normalize city name for lookup
+def normalize_city(city: str) -> str:
+    """Closest CITIES key for a city name (São Paulo when nothing matches)"""
     city_normalized = city.strip()
     
     # Find closest matching city
@@ -64,26 +91,50 @@ def _search_competitors_mock(
         # Try to find a close match
         for city_key in CITIES.keys():
             if city_key.lower() in city_normalized.lower() or city_normalized.lower() in city_key.lower():
-                city_normalized = city_key
-                break
-        else:
-            # Default to São Paulo if no match
-            city_normalized = "São Paulo"
-    
-    # Normalize category
+                return city_key
+        # Default to São Paulo if no match
+        return "São Paulo"
+    return city_normalized
+
+
+def normalize_category(category: str) -> str:
+    """Closest BUSINESS_CATEGORIES key for a category (Padaria when nothing matches)"""
     category_normalized = category.strip()
     if category_normalized not in BUSINESS_CATEGORIES:
         # Try to find close match
         for cat_key in BUSINESS_CATEGORIES.keys():
             if cat_key.lower() in category_normalized.lower() or category_normalized.lower() in cat_key.lower():
-                category_normalized = cat_key
-                break
-        else:
-            # Default to Padaria if no match
-            category_normalized = "Padaria"
+                return cat_key
+        # Default to Padaria if no match
+        return "Padaria"
+    return category_normalized
+
+
+def _search_competitors_mock(
+    category: str,
+    city: str,
+    coordinates: Optional[Coordinates],
+    radius_km: float,
+    max_results: int,
+    neighborhood: Optional[str] = None,
+    cep: Optional[str] = None
+) -> List[Competitor]:
+    """Search using mock data"""
     
-    # Get mock data (request more to allow for filtering)
-    mock_data = get_mock_competitors(city_normalized, category_normalized, count=max_results * 3)
+    city_normalized = normalize_city(city)
+    category_normalized = normalize_category(category)
+    
+    # Columnar store when one is loaded, otherwise generated mock data
+    # (request more to allow for filtering)
+    store = get_competitor_store()
+    dataset = None
+    if store is not None and store.has_market(city_normalized, category_normalized):
+        market = store.market(city_normalized, category_normalized)
+        index = get_spatial_index(city_normalized, category_normalized, market)
+    else:
+        count = max_results * 3
+        dataset = get_mock_dataset(city_normalized, category_normalized, count=count)
+        market, index = mock_search_state(city_normalized, category_normalized, dataset)
     
     # Use provided coordinates or city center
     if coordinates:
@@ -94,46 +145,42 @@ def _search_competitors_mock(
         ref_lat = city_data["lat"]
         ref_lng = city_data["lng"]
     
-    competitors = []
+    # Every record within the radius is a candidate
+    indices, distances = index.within(ref_lat, ref_lng, radius_km)
     
-    for data in mock_data:
-        # Calculate distance from reference point
-        distance = calculate_distance(
-            ref_lat,
-            ref_lng,
-            data["coordinates"]["latitude"],
-            data["coordinates"]["longitude"]
-        )
-        
-        # Only include if within radius
-        if distance > radius_km:
-            continue
-        
-        # Filter by neighborhood if provided
-        if neighborhood:
-            if neighborhood.lower() not in data["address"]["neighborhood"].lower():
-                continue
-        
-        # Filter by CEP if provided (match first 5 digits for area match)
-        if cep:
-            try:
-                # Remove formatting from CEP
-                cep_clean = cep.replace("-", "").replace(".", "").replace(" ", "")
-                data_cep_clean = data["address"]["postal_code"].replace("-", "").replace(".", "").replace(" ", "")
-                
-                # Brazilian CEP must be 8 digits
-                if len(cep_clean) == 8 and len(data_cep_clean) == 8:
-                    # Match first 5 digits (represents the broader area in Brazilian CEP system)
-                    if not data_cep_clean[:5] == cep_clean[:5]:
-                        continue
-                else:
-                    # Skip if CEP format is invalid
-                    continue
-            except (KeyError, AttributeError, TypeError):
-                # Skip this competitor if CEP data is malformed
-                continue
-        
-        competitor = Competitor(
+    # A cached larger mock dataset stands in for this count: keep only
+    # the records the count would have generated
+    if dataset is not None and len(dataset) > count:
+        mask = dataset.positions[indices] < count
+        indices, distances = indices[mask], distances[mask]
+    
+    # Remove formatting from CEP once, not per record
+    cep_clean = cep.replace("-", "").replace(".", "").replace(" ", "") if cep else None
+    
+    # Neighborhood and CEP filters run on columns, before any record is built
+    if neighborhood or cep_clean:
+        mask = market.filter_mask(indices, neighborhood, cep_clean)
+        indices, distances = indices[mask], distances[mask]
+    
+    # Bounded heap: nearest max_results in O(n log k), ties broken by dataset order
+    nearest = heapq.nsmallest(max_results, zip(distances.tolist(), indices.tolist()))
+    
+    return [_build_competitor(market.record(i), distance) for distance, i in nearest]
+
+
+def _build_competitor(data: Dict, distance: float, validate: Optional[bool] = None) -> Competitor:
+    """
+    Build a Competitor model from a raw record
+    
+    Internal records skip validation by default (model_construct), which
+    avoids most of the per-competitor cost; pass validate=True for data
+    from untrusted sources.
+    """
+    if validate is None:
+        validate = VALIDATE_INTERNAL_DATA
+    
+    if validate:
+        return Competitor(
             id=data["id"],
             name=data["name"],
             category=data["category"],
@@ -155,16 +202,29 @@ def _search_competitors_mock(
             accepts_pix=data["accepts_pix"],
             accepts_cards=data["accepts_cards"]
         )
-        competitors.append(competitor)
-        
-        # Stop if we have enough results
-        if len(competitors) >= max_results:
-            break
-    
-    # Sort by distance
-    competitors.sort(key=lambda x: x.distance_km if x.distance_km else 999)
     
-    return competitors[:max_results]
+    return Competitor.model_construct(
+        id=data["id"],
+        name=data["name"],
+        category=data["category"],
+        cnae_code=data["cnae_code"],
+        cnae_description=data["cnae_description"],
+        cnpj=data["cnpj"],
+        coordinates=Coordinates.model_construct(**data["coordinates"]),
+        address=Address.model_construct(**data["address"]),
+        phone=data["phone"],
+        rating=data["rating"],
+        review_count=data["review_count"],
+        distance_km=round(distance, 2),
+        online_presence=OnlinePresence.model_construct(**data["online_presence"]),
+        is_verified=data["is_verified"],
+        opening_year=data["opening_year"],
+        employee_count_estimate=data["employee_count_estimate"],
+        estimated_monthly_revenue=data["estimated_monthly_revenue"],
+        has_delivery=data["has_delivery"],
+        accepts_pix=data["accepts_pix"],
+        accepts_cards=data["accepts_cards"]
+    )
 
 
 def _search_competitors_google_places(
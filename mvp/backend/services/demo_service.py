@@ -2,35 +2,65 @@
 Demo request service - Business logic for handling demo requests
 """
 
+import asyncio
+import base64
+import binascii
 import logging
-from datetime import datetime
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+import os
+from datetime import datetime, timedelta
+import uuid
+from typing import Dict, Any, Callable, FrozenSet, List, Optional, Tuple
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.database import DemoRequest, DemoRequestStatus
+from models.database import DemoRequest, DemoRequestStatus, SessionLocal, AsyncSessionLocal, USE_ASYNC_DB, run_in_session
 from models.schemas import DemoRequestCreate, DemoRequestResponse
-from services.competitor_service import search_competitors
-from services.analysis_service import generate_analytics
-from services.email_service import send_analysis_email
+from services.search_pipeline import execute_search_pipeline
+from services.email_outbox import DEMO_ANALYSIS_EMAIL, enqueue_statement, outbox_dispatcher
+from services.job_queue import JobQueue
+from services.singleflight import SingleFlight
+from services.analysis_store import encode_results, store_statement, load_results, load_results_async
+from services.analysis_cache import (
+    ANALYSIS_CACHE_TTL_MINUTES,
+    analysis_cache_counters,
+    cache_entry_statement,
+    cache_key,
+    cached_analysis_statement,
+    normalize_inputs
+)
+from services.http_cache import make_etag
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Background processing of demo requests
+DEMO_JOB_CONCURRENCY = int(os.getenv("DEMO_JOB_CONCURRENCY", "4"))
+DEMO_JOB_MAX_ATTEMPTS = int(os.getenv("DEMO_JOB_MAX_ATTEMPTS", "3"))
+DEMO_JOB_BACKOFF_SECONDS = float(os.getenv("DEMO_JOB_BACKOFF_SECONDS", "2"))
+# Unfinished requests not touched for this long are picked up again,
+# checked every DEMO_JOB_RECOVERY_INTERVAL_SECONDS (at most a batch per check)
+DEMO_JOB_RECOVERY_MINUTES = int(os.getenv("DEMO_JOB_RECOVERY_MINUTES", "10"))
+DEMO_JOB_RECOVERY_INTERVAL_SECONDS = float(os.getenv("DEMO_JOB_RECOVERY_INTERVAL_SECONDS", "60"))
+DEMO_JOB_RECOVERY_BATCH_SIZE = 500
 
-async def process_demo_request(
+DEMO_SEARCH_RADIUS_KM = 5.0
+DEMO_MAX_RESULTS = 10
+
+
+def store_demo_request(
     demo_data: DemoRequestCreate,
     db: Session
 ) -> DemoRequestResponse:
     """
-    Process a demo request from the landing page
+    Store a demo request from the landing page with status="pending"
     
-    Steps:
-    1. Create database record with status="pending"
-    2. Trigger competitor analysis
-    3. Update record with results and status="completed"
-    4. Send email with analysis results
-    5. Return response to user
+    The analysis and email run later on the background job queue
+    (see process_demo_request); call enqueue_demo_request with the id.
+    
+    id and timestamps are generated here, so this is one INSERT and one
+    commit with no read-back.
     
     Args:
         demo_data: Demo request data from landing page
@@ -40,173 +70,621 @@ async def process_demo_request(
         DemoRequestResponse with request details
     """
     
-    # Step 1: Create database record
-    db_request = DemoRequest(
-        business_name=demo_data.business_name,
-        email=demo_data.email,
-        city=demo_data.city,
-        state=demo_data.state,
-        category=demo_data.category.value,
-        status=DemoRequestStatus.PENDING
-    )
+    row = _demo_request_row(demo_data)
     
-    db.add(db_request)
+    db.execute(insert(DemoRequest), [row])
     db.commit()
-    db.refresh(db_request)
     
-    logger.info("Created demo request: %s for %s", db_request.id, demo_data.email)
+    logger.info("Created demo request: %s for %s", row["id"], demo_data.email)
     
-    try:
-        # Step 2: Update status to processing
-        db_request.status = DemoRequestStatus.PROCESSING
+    return _accepted_response(row)
+
+
+async def store_demo_request_async(
+    demo_data: DemoRequestCreate,
+    db: AsyncSession
+) -> DemoRequestResponse:
+    """Async version of store_demo_request (DATABASE_ASYNC=true)"""
+    
+    row = _demo_request_row(demo_data)
+    
+    await db.execute(insert(DemoRequest), [row])
+    await db.commit()
+    
+    logger.info("Created demo request: %s for %s", row["id"], demo_data.email)
+    
+    return _accepted_response(row)
+
+
+def bulk_store_demo_requests(
+    demo_data: List[DemoRequestCreate],
+    db: Session
+) -> List[str]:
+    """
+    Store many demo requests (e.g. an import) with status="pending"
+    
+    All rows go in one executemany INSERT (batched into multi-row
+    VALUES by the driver) and one commit. Nothing is enqueued; call
+    enqueue_demo_request for the returned ids, or let
+    recover_demo_requests pick them up.
+    
+    Args:
+        demo_data: Demo requests to store
+        db: Database session
+    
+    Returns:
+        Ids of the stored requests, in input order
+    """
+    
+    rows = [_demo_request_row(item) for item in demo_data]
+    if rows:
+        db.execute(insert(DemoRequest), rows)
         db.commit()
-        
-        # Step 3: Trigger competitor analysis
-        logger.info("Starting competitor analysis for %s", demo_data.business_name)
-        
-        competitors = search_competitors(
-            category=demo_data.category.value,
-            city=demo_data.city,
-            coordinates=None,
-            radius_km=5.0,
-            max_results=10,
-            neighborhood=None,
-            cep=None
-        )
-        
-        # Generate analytics
-        # Include mock "your business" data for better recommendations
-        your_business = {
-            "name": demo_data.business_name,
-            "rating": 4.2,
-            "review_count": 50,
-            "online_presence": {
-                "has_website": False,
-                "has_instagram": True,
-                "has_facebook": True,
-                "instagram_followers": 1000,
-                "facebook_likes": 500
-            },
-            "estimated_monthly_revenue": 35000,
-            "has_delivery": True,
-            "accepts_pix": True
-        }
-        
-        analytics = generate_analytics(
-            competitors=competitors,
-            radius_km=5.0,
-            your_business=your_business
-        )
-        
-        # Build analysis results
-        # Convert Pydantic models to dicts for JSON storage
-        competitors_dict = [comp.model_dump() for comp in competitors]
-        analytics_dict = {
-            "market_density": analytics.market_density.model_dump(),
-            "competitive_positioning": analytics.competitive_positioning.model_dump() if analytics.competitive_positioning else None,
-            "market_share_estimate": analytics.market_share_estimate.model_dump() if analytics.market_share_estimate else None,
-            "kpi_recommendations": [kpi.model_dump() for kpi in analytics.kpi_recommendations],
-            "summary": analytics.summary
-        }
-        
-        analysis_results = {
-            "competitors": competitors_dict,
-            "analytics": analytics_dict,
-            "total_found": len(competitors),
-            "search_radius_km": 5.0
+    
+    logger.info("Bulk created %d demo requests", len(rows))
+    return [row["id"] for row in rows]
+
+
+def _demo_request_row(demo_data: DemoRequestCreate) -> Dict[str, Any]:
+    """Column values for a new request, generated client-side"""
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        "business_name": demo_data.business_name,
+        "email": demo_data.email,
+        "city": demo_data.city,
+        "state": demo_data.state,
+        "category": demo_data.category.value,
+        "status": DemoRequestStatus.PENDING,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+def _accepted_response(row: Dict[str, Any]) -> DemoRequestResponse:
+    return DemoRequestResponse(
+        id=row["id"],
+        business_name=row["business_name"],
+        email=row["email"],
+        city=row["city"],
+        state=row["state"],
+        category=row["category"],
+        status=row["status"].value,
+        created_at=row["created_at"],
+        message=f"Solicitação recebida! Estamos preparando sua análise competitiva em {row['city']}. Você receberá os resultados no email {row['email']} em alguns minutos."
+    )
+
+
+def build_analysis_results(competitors, analytics, radius_km: float) -> Dict[str, Any]:
+    """Convert pipeline output (Pydantic models) to dicts for JSON storage"""
+    competitors_dict = [comp.model_dump() for comp in competitors]
+    analytics_dict = {
+        "market_density": analytics.market_density.model_dump(),
+        "competitive_positioning": analytics.competitive_positioning.model_dump() if analytics.competitive_positioning else None,
+        "market_share_estimate": analytics.market_share_estimate.model_dump() if analytics.market_share_estimate else None,
+        "kpi_recommendations": [kpi.model_dump() for kpi in analytics.kpi_recommendations],
+        "summary": analytics.summary
+    }
+    
+    return {
+        "competitors": competitors_dict,
+        "analytics": analytics_dict,
+        "total_found": len(competitors),
+        "search_radius_km": radius_km
+    }
+
+
+def demo_your_business(business_name: str) -> Dict[str, Any]:
+    """Mock "your business" data for better recommendations"""
+    return {
+        "name": business_name,
+        "rating": 4.2,
+        "review_count": 50,
+        "online_presence": {
+            "has_website": False,
+            "has_instagram": True,
+            "has_facebook": True,
+            "instagram_followers": 1000,
+            "facebook_likes": 500
+        },
+        "estimated_monthly_revenue": 35000,
+        "has_delivery": True,
+        "accepts_pix": True
+    }
+
+
+# Columns the background job reads
+JOB_COLUMNS = (
+    DemoRequest.business_name,
+    DemoRequest.email,
+    DemoRequest.city,
+    DemoRequest.state,
+    DemoRequest.category
+)
+
+
+def _start_statement(request_id: str):
+    """Mark a request processing and return the job's columns; no row if it is gone or completed"""
+    return (
+        update(DemoRequest)
+        .where(DemoRequest.id == request_id)
+        .where(DemoRequest.status != DemoRequestStatus.COMPLETED)
+        .values(status=DemoRequestStatus.PROCESSING, updated_at=datetime.utcnow())
+        .returning(*JOB_COLUMNS)
+    )
+
+
+def _update_statement(request_id: str, values: Dict[str, Any], unless_status: Optional[DemoRequestStatus] = None):
+    """Single UPDATE ... WHERE id = :id, no read of the row first"""
+    statement = (
+        update(DemoRequest)
+        .where(DemoRequest.id == request_id)
+        .values(updated_at=datetime.utcnow(), **values)
+    )
+    if unless_status is not None:
+        statement = statement.where(DemoRequest.status != unless_status)
+    return statement
+
+
+def _write_statements(
+    request_id: str,
+    values: Dict[str, Any],
+    unless_status: Optional[DemoRequestStatus],
+    email: Optional[Dict[str, Any]] = None
+) -> list:
+    """
+    Statements for one transaction
+    
+    The request row UPDATE, plus, with email (the demo's fields), the
+    results email for values["analysis_hash"] in the outbox.
+    """
+    statements = [_update_statement(request_id, values, unless_status)]
+    if email is not None:
+        statements.append(_analysis_email_statement(request_id, email, values["analysis_hash"]))
+    return statements
+
+
+def _analysis_email_statement(request_id: str, demo: Dict[str, Any], analysis_hash: str):
+    """Outbox entry for a request's results email (at most one per request)"""
+    return enqueue_statement(
+        DEMO_ANALYSIS_EMAIL,
+        f"demo-analysis:{request_id}",
+        demo["email"],
+        {
+            "request_id": request_id,
+            "business_name": demo["business_name"],
+            "city": demo["city"],
+            "state": demo["state"],
+            "category": demo["category"],
+            "analysis_hash": analysis_hash
         }
-        
-        logger.info("Analysis completed: found %d competitors", len(competitors))
-        
-        # Step 4: Store results in database
-        db_request.analysis_results = analysis_results
-        db_request.status = DemoRequestStatus.COMPLETED
-        db_request.updated_at = datetime.utcnow()
+    )
+
+
+def _start_demo_request_sync(request_id: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        row = db.execute(_start_statement(request_id)).mappings().first()
         db.commit()
-        
-        # Step 5: Send email with results
-        logger.info("Sending analysis email to %s", demo_data.email)
-        
-        email_sent = await send_analysis_email(
-            to_email=demo_data.email,
-            business_name=demo_data.business_name,
-            city=demo_data.city,
-            state=demo_data.state or "",
-            category=demo_data.category.value,
-            analysis_results=analysis_results
-        )
-        
-        if not email_sent:
-            logger.warning("Email sending failed, but request completed successfully")
-        
-        # Step 6: Return success response
-        message = f"Análise enviada com sucesso! Encontramos {len(competitors)} concorrentes em {demo_data.city}. Verifique seu email {demo_data.email} para ver os detalhes."
-        
-        return DemoRequestResponse(
-            id=db_request.id,
-            business_name=db_request.business_name,
-            email=db_request.email,
-            city=db_request.city,
-            state=db_request.state,
-            category=db_request.category,
-            status=db_request.status.value,
-            created_at=db_request.created_at,
-            message=message
-        )
-        
-    except Exception as e:
-        # Handle errors: update status to failed
-        logger.error("Error processing demo request: %s", str(e))
-        
-        db_request.status = DemoRequestStatus.FAILED
-        db_request.error_message = str(e)
-        db_request.updated_at = datetime.utcnow()
+        return dict(row) if row else None
+    finally:
+        db.close()
+
+
+def _update_demo_request_sync(
+    request_id: str,
+    values: Dict[str, Any],
+    unless_status: Optional[DemoRequestStatus],
+    email: Optional[Dict[str, Any]]
+) -> None:
+    db = SessionLocal()
+    try:
+        for statement in _write_statements(request_id, values, unless_status, email):
+            db.execute(statement)
         db.commit()
+    finally:
+        db.close()
+
+
+def _cached_analysis_sync(key: str) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        return db.scalar(cached_analysis_statement(key))
+    finally:
+        db.close()
+
+
+async def _cached_analysis(key: str) -> Optional[str]:
+    """Result hash of a live analysis cache entry, if any"""
+    if not USE_ASYNC_DB:
+        cached = await asyncio.to_thread(_cached_analysis_sync, key)
+    else:
+        async with AsyncSessionLocal() as db:
+            cached = await db.scalar(cached_analysis_statement(key))
+    analysis_cache_counters["hits" if cached else "misses"] += 1
+    return cached
+
+
+async def _start_demo_request(request_id: str) -> Optional[Dict[str, Any]]:
+    """Mark the request processing and read the fields the job needs, in one statement"""
+    if not USE_ASYNC_DB:
+        return await asyncio.to_thread(_start_demo_request_sync, request_id)
+    
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(_start_statement(request_id))).mappings().first()
+        await db.commit()
+        return dict(row) if row else None
+
+
+async def _update_demo_request(
+    request_id: str,
+    unless_status: Optional[DemoRequestStatus] = None,
+    email: Optional[Dict[str, Any]] = None,
+    **values: Any
+) -> None:
+    """
+    Update columns of a demo request in one statement and commit
+    
+    Rows whose status is unless_status are left untouched. Passing email
+    also queues the results email (see _write_statements), in the same
+    transaction.
+    """
+    if not USE_ASYNC_DB:
+        return await asyncio.to_thread(_update_demo_request_sync, request_id, values, unless_status, email)
+    
+    async with AsyncSessionLocal() as db:
+        for statement in _write_statements(request_id, values, unless_status, email):
+            await db.execute(statement)
+        await db.commit()
+
+
+# Demo analyses of one market in flight at the same time run once
+demo_analysis_flights = SingleFlight("demo_analysis")
+
+
+def _execute_and_commit(db: Session, statements: list) -> None:
+    for statement in statements:
+        db.execute(statement)
+    db.commit()
+
+
+async def _pipeline_analysis(city: str, category: str, business_name: str) -> Dict[str, Any]:
+    """Competitor search + analytics for a market on the pipeline executor"""
+    competitors, analytics, _ = await execute_search_pipeline(
+        category=category,
+        city=city,
+        coordinates=None,
+        radius_km=DEMO_SEARCH_RADIUS_KM,
+        max_results=DEMO_MAX_RESULTS,
+        neighborhood=None,
+        cep=None,
+        your_business=demo_your_business(business_name)
+    )
+    return build_analysis_results(competitors, analytics, DEMO_SEARCH_RADIUS_KM)
+
+
+async def market_analysis(
+    city: str,
+    state: Optional[str],
+    category: str,
+    business_name: str,
+    then: Optional[Callable[[str], list]] = None
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Demo analysis of a market, computed at most once per cache TTL
+    
+    Cache lookup, pipeline run, encoding and the store of the results
+    and cache entry happen in one call shared by concurrent callers with
+    the same cache key, so a burst of requests for a market costs one
+    lookup, one run and one write. The store commits before the call
+    resolves, so later callers find the cache entry. Demo requests and
+    digests for a market share one stored result.
+    
+    then(analysis_hash) returns the caller's own statements (e.g. its
+    request row and email). They commit with the store when this caller
+    ran the analysis, otherwise in their own transaction once the shared
+    call resolves: one commit either way.
+    
+    Returns:
+        (analysis_hash, results); results is None when the analysis was
+        reused from the cache (load_results fetches it). The results
+        dict is shared between callers; don't mutate it.
+    """
+    inputs = normalize_inputs(city, state, category)
+    key = cache_key(inputs, radius_km=DEMO_SEARCH_RADIUS_KM, max_results=DEMO_MAX_RESULTS)
+    
+    written = False
+    
+    async def analyze() -> Tuple[str, Optional[Dict[str, Any]]]:
+        nonlocal written
+        if ANALYSIS_CACHE_TTL_MINUTES > 0:
+            analysis_hash = await _cached_analysis(key)
+            if analysis_hash is not None:
+                return analysis_hash, None
         
-        # Still return a response, but with error status
-        return DemoRequestResponse(
-            id=db_request.id,
-            business_name=db_request.business_name,
-            email=db_request.email,
-            city=db_request.city,
-            state=db_request.state,
-            category=db_request.category,
-            status=db_request.status.value,
-            created_at=db_request.created_at,
-            message=f"Houve um erro ao processar sua solicitação. Por favor, tente novamente mais tarde ou entre em contato conosco."
-        )
-
-
-def get_demo_request(request_id: str, db: Session) -> Dict[str, Any]:
+        results = await _pipeline_analysis(city, category, business_name)
+        row = encode_results(results)
+        statements = [store_statement(row)]
+        if ANALYSIS_CACHE_TTL_MINUTES > 0:
+            statements.append(cache_entry_statement(key, inputs, row["hash"]))
+            analysis_cache_counters["stores"] += 1
+        if then is not None:
+            statements.extend(then(row["hash"]))
+            written = True
+        await run_in_session(_execute_and_commit, statements)
+        return row["hash"], results
+    
+    analysis_hash, results = await demo_analysis_flights.do(key, analyze)
+    if then is not None and not written:
+        await run_in_session(_execute_and_commit, then(analysis_hash))
+    return analysis_hash, results
+
+
+async def process_demo_request(
+    request_id: str,
+    report: Callable[[str], None] = lambda stage: None
+) -> None:
+    """
+    Background job: analyze a stored demo request and queue the results email
+    
+    Steps:
+    1. Get the market's analysis through market_analysis: reused from
+       the analysis cache, or run on the pipeline executor and stored
+       (once for concurrent requests of the same market)
+    2. Set status="completed" with the analysis hash and add the results
+       email to the outbox, in one transaction (the store's, when this
+       request ran the analysis)
+    
+    Delivery is the outbox dispatcher's job (services.email_outbox), so
+    SMTP latency and failures never hold up or fail the analysis.
+    
+    The job starts with one UPDATE ... RETURNING that marks the request
+    "processing" (refreshing updated_at, so recovery leaves it alone) and
+    reads its fields, so it commits twice: that and the results. Finer
+    stages are reported through the job queue's progress. Requests left
+    "pending" or "processing" by a crash are picked up again by
+    recover_demo_requests.
+    
+    Safe to retry: a completed request is left as is. Exceptions
+    propagate so the job queue can retry.
+    
+    Args:
+        request_id: Demo request ID
+        report: Progress callback, receives the current stage name
+    """
+    
+    demo = await _start_demo_request(request_id)
+    if demo is None:
+        logger.info("Demo request %s is gone or already completed, skipping", request_id)
+        return
+    
+    def complete(analysis_hash: str) -> list:
+        # Step 2: Point the request at the stored result and queue the email
+        values = {"analysis_hash": analysis_hash, "status": DemoRequestStatus.COMPLETED, "error_message": None}
+        return _write_statements(request_id, values, None, demo)
+    
+    # Step 1: Cached or freshly stored analysis of the market
+    report("analyzing")
+    analysis_hash, analysis_results = await market_analysis(
+        demo["city"], demo["state"], demo["category"], demo["business_name"], then=complete
+    )
+    if analysis_results is None:
+        logger.info("Reused cached analysis %s for %s", analysis_hash[:12], demo["business_name"])
+    else:
+        logger.info("Analysis for %s found %d competitors", demo["business_name"], analysis_results["total_found"])
+    
+    outbox_dispatcher.wake()
+
+
+async def _on_demo_request_failed(request_id: str, error: Exception) -> None:
+    """Mark a request as failed once retries are exhausted (unless results were stored)"""
+    # A completed request keeps its status: the analysis is stored and
+    # visible, only the email could not be delivered
+    await _update_demo_request(
+        request_id,
+        unless_status=DemoRequestStatus.COMPLETED,
+        status=DemoRequestStatus.FAILED,
+        error_message=str(error)
+    )
+
+
+def _claim_unfinished(db: Session, limit: int) -> List[str]:
+    """
+    Claim up to limit pending/processing requests not touched for
+    DEMO_JOB_RECOVERY_MINUTES
+
+    The claim is one UPDATE ... RETURNING that bumps updated_at, so a
+    request is returned to one instance only and not again until it has
+    been stale for another DEMO_JOB_RECOVERY_MINUTES.
+    """
+    now = datetime.utcnow()
+    stale = (
+        DemoRequest.status.in_([DemoRequestStatus.PENDING, DemoRequestStatus.PROCESSING]),
+        DemoRequest.updated_at < now - timedelta(minutes=DEMO_JOB_RECOVERY_MINUTES)
+    )
+    candidates = select(DemoRequest.id).where(*stale).order_by(DemoRequest.updated_at).limit(limit)
+    claimed = db.scalars(
+        update(DemoRequest)
+        .where(DemoRequest.id.in_(candidates.scalar_subquery()))
+        .where(*stale)
+        .values(updated_at=now)
+        .returning(DemoRequest.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return list(claimed)
+
+
+async def recover_demo_requests() -> List[str]:
+    """Requests left unfinished (e.g. by a crash or restart), claimed for this instance"""
+    return await run_in_session(_claim_unfinished, DEMO_JOB_RECOVERY_BATCH_SIZE)
+
+
+demo_job_queue = JobQueue(
+    "demo-requests",
+    process_demo_request,
+    concurrency=DEMO_JOB_CONCURRENCY,
+    max_attempts=DEMO_JOB_MAX_ATTEMPTS,
+    backoff_base=DEMO_JOB_BACKOFF_SECONDS,
+    on_failure=_on_demo_request_failed,
+    recover=recover_demo_requests,
+    recover_interval=DEMO_JOB_RECOVERY_INTERVAL_SECONDS
+)
+
+
+def enqueue_demo_request(request_id: str) -> None:
+    """Schedule background processing of a stored demo request"""
+    demo_job_queue.enqueue(request_id)
+
+
+# Fields of GET /api/demo-request/{id} and the columns each one reads
+# ("analysis_results" resolves through analysis_hash; "progress" is in memory)
+DEMO_REQUEST_FIELDS = {
+    "id": DemoRequest.id,
+    "business_name": DemoRequest.business_name,
+    "email": DemoRequest.email,
+    "city": DemoRequest.city,
+    "state": DemoRequest.state,
+    "category": DemoRequest.category,
+    "status": DemoRequest.status,
+    "created_at": DemoRequest.created_at,
+    "updated_at": DemoRequest.updated_at,
+    "analysis_results": DemoRequest.analysis_hash,
+    "error_message": DemoRequest.error_message,
+    "progress": None
+}
+
+ALL_FIELDS = frozenset(DEMO_REQUEST_FIELDS)
+
+
+def resolve_fields(fields: Optional[str] = None, exclude: Optional[str] = None) -> FrozenSet[str]:
+    """
+    Field set from comma-separated fields/exclude query parameters
+    
+    Raises:
+        ValueError: on unknown field names
+    """
+    selected = ALL_FIELDS
+    for names, keep in ((fields, True), (exclude, False)):
+        if not names:
+            continue
+        requested = {name.strip() for name in names.split(",") if name.strip()}
+        unknown = requested - ALL_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        selected = selected & requested if keep else selected - requested
+    return frozenset(selected)
+
+
+def _projection_statement(request_id: str, fields: FrozenSet[str]):
+    """SELECT of only the columns behind the requested fields (plus the ETag inputs)"""
+    columns = {DemoRequest.id, DemoRequest.updated_at}
+    columns.update(DEMO_REQUEST_FIELDS[name] for name in fields if DEMO_REQUEST_FIELDS[name] is not None)
+    return select(DemoRequest).options(load_only(*columns)).where(DemoRequest.id == request_id)
+
+
+def demo_request_etag(db_request: DemoRequest, fields: FrozenSet[str]) -> str:
+    """
+    ETag for a projection of a demo request
+    
+    Derived from updated_at (every write bumps it), the field set and,
+    when requested, the in-memory job progress.
+    """
+    progress = demo_job_queue.progress(db_request.id) if "progress" in fields else None
+    progress_key = f"{progress['stage']}:{progress['attempts']}" if progress else ""
+    key = f"{db_request.id}|{db_request.updated_at.isoformat()}|{','.join(sorted(fields))}|{progress_key}"
+    return make_etag(key.encode("utf-8"))
+
+
+def get_demo_request(
+    request_id: str,
+    db: Session,
+    fields: FrozenSet[str] = ALL_FIELDS,
+    etag_matches: Optional[Callable[[str], bool]] = None
+) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
     """
     Get a demo request by ID (for admin or user to check status)
     
+    Only the columns behind `fields` are read; the analysis results are
+    loaded and decompressed only when "analysis_results" is requested.
+    
     Args:
         request_id: Demo request ID
         db: Database session
+        fields: Fields to return (see resolve_fields)
+        etag_matches: Conditional GET check; when it accepts the ETag the
+            details are not built
     
     Returns:
-        Demo request details including analysis results
+        (etag, details), details None when etag_matches accepted the
+        ETag, or None if the request does not exist
     """
     
-    db_request = db.query(DemoRequest).filter(DemoRequest.id == request_id).first()
+    db_request = db.scalar(_projection_statement(request_id, fields))
+    if not db_request:
+        return None
+    
+    etag = demo_request_etag(db_request, fields)
+    if etag_matches is not None and etag_matches(etag):
+        return etag, None
+    
+    analysis_results = None
+    if "analysis_results" in fields:
+        if db_request.analysis_hash:
+            analysis_results = load_results(db, db_request.analysis_hash)
+        else:
+            analysis_results = db.scalar(_legacy_results_statement(request_id))
+    return etag, _demo_request_details(db_request, fields, analysis_results)
+
+
+async def get_demo_request_async(
+    request_id: str,
+    db: AsyncSession,
+    fields: FrozenSet[str] = ALL_FIELDS,
+    etag_matches: Optional[Callable[[str], bool]] = None
+) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+    """Async version of get_demo_request (DATABASE_ASYNC=true)"""
     
+    db_request = await db.scalar(_projection_statement(request_id, fields))
     if not db_request:
         return None
     
-    return {
-        "id": db_request.id,
-        "business_name": db_request.business_name,
-        "email": db_request.email,
-        "city": db_request.city,
-        "state": db_request.state,
-        "category": db_request.category,
-        "status": db_request.status.value,
-        "created_at": db_request.created_at,
-        "updated_at": db_request.updated_at,
-        "analysis_results": db_request.analysis_results,
-        "error_message": db_request.error_message
-    }
+    etag = demo_request_etag(db_request, fields)
+    if etag_matches is not None and etag_matches(etag):
+        return etag, None
+    
+    analysis_results = None
+    if "analysis_results" in fields:
+        if db_request.analysis_hash:
+            analysis_results = await load_results_async(db, db_request.analysis_hash)
+        else:
+            analysis_results = await db.scalar(_legacy_results_statement(request_id))
+    return etag, _demo_request_details(db_request, fields, analysis_results)
+
+
+def _legacy_results_statement(request_id: str):
+    """Inline results of requests completed before analysis_results existed"""
+    return select(DemoRequest.analysis_results).where(DemoRequest.id == request_id)
+
+
+def _demo_request_details(
+    db_request: DemoRequest,
+    fields: FrozenSet[str],
+    analysis_results: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    details = {}
+    for name in DEMO_REQUEST_FIELDS:
+        if name not in fields:
+            continue
+        if name == "analysis_results":
+            details[name] = analysis_results
+        elif name == "progress":
+            details[name] = demo_job_queue.progress(db_request.id)
+        elif name == "status":
+            details[name] = db_request.status.value
+        else:
+            details[name] = getattr(db_request, name)
+    return details
 
 
 def list_demo_requests(db: Session, limit: int = 50) -> list:
@@ -222,16 +700,123 @@ def list_demo_requests(db: Session, limit: int = 50) -> list:
     """
     
     requests = db.query(DemoRequest).order_by(DemoRequest.created_at.desc()).limit(limit).all()
+    return [_demo_request_summary(req) for req in requests]
+
+
+async def list_demo_requests_async(db: AsyncSession, limit: int = 50) -> list:
+    """Async version of list_demo_requests (DATABASE_ASYNC=true)"""
     
-    return [
-        {
-            "id": req.id,
-            "business_name": req.business_name,
-            "email": req.email,
-            "city": req.city,
-            "category": req.category,
-            "status": req.status.value,
-            "created_at": req.created_at
-        }
-        for req in requests
-    ]
+    requests = await db.scalars(select(DemoRequest).order_by(DemoRequest.created_at.desc()).limit(limit))
+    return [_demo_request_summary(req) for req in requests]
+
+
+def _demo_request_summary(req: DemoRequest) -> Dict[str, Any]:
+    return {
+        "id": req.id,
+        "business_name": req.business_name,
+        "email": req.email,
+        "city": req.city,
+        "category": req.category,
+        "status": req.status.value,
+        "created_at": req.created_at
+    }
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, request_id: str) -> str:
+    """Opaque keyset cursor for the (created_at, id) of the last row on a page"""
+    raw = f"{created_at.isoformat()}|{request_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Parse a cursor from encode_cursor
+    
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, request_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), request_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def _page_query(
+    limit: int,
+    cursor: Optional[str],
+    status: Optional[DemoRequestStatus],
+    email: Optional[str]
+):
+    """Newest first, seeking past the cursor on the (created_at, id) index"""
+    statement = select(DemoRequest)
+    if status is not None:
+        statement = statement.where(DemoRequest.status == status)
+    if email:
+        statement = statement.where(DemoRequest.email == email.strip())
+    if cursor:
+        created_at, request_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(DemoRequest.created_at, DemoRequest.id) < tuple_(created_at, request_id))
+    # One extra row tells whether another page exists
+    return statement.order_by(DemoRequest.created_at.desc(), DemoRequest.id.desc()).limit(limit + 1)
+
+
+def _page(requests: list, limit: int) -> Dict[str, Any]:
+    items = requests[:limit]
+    next_cursor = None
+    if len(requests) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return {
+        "items": [_demo_request_summary(req) for req in items],
+        "next_cursor": next_cursor
+    }
+
+
+def list_demo_requests_page(
+    db: Session,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[DemoRequestStatus] = None,
+    email: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Keyset-paginated demo request listing (admin endpoint)
+    
+    Each page is an index range scan from the cursor, so the cost does not
+    grow with the page number the way OFFSET does.
+    
+    Args:
+        db: Database session
+        limit: Page size
+        cursor: next_cursor from the previous page (None for the first page)
+        status: Only requests with this status
+        email: Only requests from this email
+    
+    Returns:
+        {"items": [...], "next_cursor": str or None}
+    
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    
+    requests = list(db.scalars(_page_query(limit, cursor, status, email)))
+    return _page(requests, limit)
+
+
+async def list_demo_requests_page_async(
+    db: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[DemoRequestStatus] = None,
+    email: Optional[str] = None
+) -> Dict[str, Any]:
+    """Async version of list_demo_requests_page (DATABASE_ASYNC=true)"""
+    
+    requests = list(await db.scalars(_page_query(limit, cursor, status, email)))
+    return _page(requests, limit)
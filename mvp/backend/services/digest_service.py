@@ -0,0 +1,294 @@
+"""
+Digest emails for subscribed businesses
+
+A digest send groups subscribers by market (normalized city, state and
+category), gets each market's analysis once (from the analysis cache when
+live, see demo_service.market_analysis), and adds one email per
+subscriber to the email outbox. The outbox dispatcher renders each
+market's fragments once and delivers the emails with its retries and
+dead-lettering, so a crash or SMTP outage mid-send loses nothing.
+
+Each email's idempotency key is digest:<campaign>:<email>:<market>, the
+campaign defaulting to the UTC date, so running the same digest again
+(e.g. after a partial failure) only queues the emails not queued yet.
+Markets are prepared concurrently and each one's emails are queued in
+batches as soon as its analysis is ready.
+
+Start one through POST /api/admin/digest, or from mvp/backend with a CSV
+of subscribers (business_name,email,city,state,category):
+    python -m services.digest_service subscribers.csv --deliver
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from models.database import async_engine, init_db, run_in_session
+from models.schemas import DigestSubscriber
+from services.analysis_cache import normalize_inputs
+from services.demo_service import market_analysis
+from services.email_outbox import DIGEST_EMAIL, enqueue_statement, outbox_dispatcher
+from services.executor import StageStats
+from services.smtp_sender import smtp_sender
+
+logger = logging.getLogger(__name__)
+
+# Market analyses computed at once, and outbox rows written per transaction
+DIGEST_MARKET_CONCURRENCY = int(os.getenv("DIGEST_MARKET_CONCURRENCY", "4"))
+DIGEST_ENQUEUE_BATCH_SIZE = int(os.getenv("DIGEST_ENQUEUE_BATCH_SIZE", "500"))
+# Finished runs kept for the status endpoint and /api/metrics
+DIGEST_RUNS_TRACKED = 20
+
+
+def group_by_market(subscribers: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str, str], List[Dict[str, Any]]]:
+    """Subscribers per normalized market, each email at most once per market"""
+    markets: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+    seen: Set[Tuple[Tuple[str, str, str], str]] = set()
+    for subscriber in subscribers:
+        inputs = normalize_inputs(subscriber["city"], subscriber.get("state"), subscriber["category"])
+        market = (inputs["city"], inputs["state"], inputs["category"])
+        email = subscriber["email"].casefold()
+        if (market, email) in seen:
+            continue
+        seen.add((market, email))
+        markets.setdefault(market, []).append(subscriber)
+    return markets
+
+
+class DigestRun:
+    """Progress and throughput of one digest send"""
+
+    def __init__(self, subscribers: Iterable[Dict[str, Any]], campaign: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.campaign = campaign or datetime.utcnow().strftime("%Y-%m-%d")
+        # Released by finish(), so tracked runs keep only their counters
+        self.markets = group_by_market(subscribers)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._started = 0.0
+        self._elapsed: Optional[float] = None
+        self.analysis_latency = StageStats()
+        self.enqueue_latency = StageStats()
+        self.counters = {
+            "recipients": sum(map(len, self.markets.values())),
+            "markets": len(self.markets),
+            "markets_done": 0,
+            "markets_failed": 0,
+            "analyses_reused": 0,
+            "queued": 0,
+            "duplicates": 0,
+            "skipped": 0
+        }
+
+    def start(self) -> None:
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+
+    def finish(self) -> None:
+        self.finished_at = datetime.utcnow()
+        self._elapsed = time.perf_counter() - self._started
+        self.markets = {}
+
+    @property
+    def elapsed(self) -> float:
+        if self._elapsed is not None:
+            return self._elapsed
+        return time.perf_counter() - self._started if self.started_at else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.counters["queued"] + self.counters["duplicates"] + self.counters["skipped"]
+        elapsed = self.elapsed
+        if self.finished_at:
+            state = "finished"
+        else:
+            state = "running" if self.started_at else "pending"
+        return {
+            "id": self.id,
+            "campaign": self.campaign,
+            "state": state,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsed_s": round(elapsed, 3),
+            "progress": round(done / self.counters["recipients"], 4) if self.counters["recipients"] else 1.0,
+            "queued_per_second": round(self.counters["queued"] / elapsed, 1) if elapsed else 0.0,
+            **self.counters,
+            "analysis_latency": self.analysis_latency.to_dict(),
+            "enqueue_latency": self.enqueue_latency.to_dict()
+        }
+
+
+def _enqueue_emails(db: Session, statements: list) -> int:
+    """Insert outbox rows in one transaction; returns how many were new"""
+    queued = sum(db.execute(statement).rowcount for statement in statements)
+    db.commit()
+    return queued
+
+
+def _digest_email_statement(run: DigestRun, market: Tuple[str, str, str], subscriber: Dict[str, Any], analysis_hash: str):
+    email = subscriber["email"]
+    return enqueue_statement(
+        DIGEST_EMAIL,
+        f"digest:{run.campaign}:{email.casefold()}:{':'.join(market)}",
+        email,
+        {
+            "business_name": subscriber["business_name"],
+            "city": subscriber["city"],
+            "state": subscriber.get("state"),
+            "category": subscriber["category"],
+            "analysis_hash": analysis_hash
+        }
+    )
+
+
+async def run_digest(
+    run: DigestRun,
+    market_concurrency: int = DIGEST_MARKET_CONCURRENCY,
+    batch_size: int = DIGEST_ENQUEUE_BATCH_SIZE
+) -> DigestRun:
+    """
+    Queue the digest email of every subscriber of the run in the outbox
+
+    A market whose analysis fails is skipped (its recipients counted as
+    skipped); emails already in the outbox for the campaign are counted
+    as duplicates. Delivery is left to the outbox dispatcher.
+    """
+    run.start()
+    logger.info("Digest %s (%s): %d recipients in %d markets", run.id, run.campaign, run.counters["recipients"], run.counters["markets"])
+    market_gate = asyncio.Semaphore(market_concurrency)
+
+    async def prepare(market: Tuple[str, str, str], subscribers: List[Dict[str, Any]]) -> None:
+        first = subscribers[0]
+        async with market_gate:
+            started = time.perf_counter()
+            try:
+                analysis_hash, results = await market_analysis(
+                    first["city"], first.get("state"), first["category"], first["business_name"]
+                )
+            except Exception:
+                logger.exception("Digest %s: analysis of %s/%s failed", run.id, first["city"], first["category"])
+                run.counters["markets_failed"] += 1
+                run.counters["skipped"] += len(subscribers)
+                return
+            run.analysis_latency.record((time.perf_counter() - started) * 1000)
+            if results is None:
+                run.counters["analyses_reused"] += 1
+            run.counters["markets_done"] += 1
+
+        started = time.perf_counter()
+        for i in range(0, len(subscribers), batch_size):
+            batch = subscribers[i:i + batch_size]
+            statements = [_digest_email_statement(run, market, subscriber, analysis_hash) for subscriber in batch]
+            queued = await run_in_session(_enqueue_emails, statements)
+            run.counters["queued"] += queued
+            run.counters["duplicates"] += len(batch) - queued
+            outbox_dispatcher.wake()
+        run.enqueue_latency.record((time.perf_counter() - started) * 1000)
+
+    try:
+        await asyncio.gather(*(prepare(market, subscribers) for market, subscribers in run.markets.items()))
+    finally:
+        run.finish()
+
+    stats = run.stats()
+    logger.info(
+        "Digest %s finished in %.1fs: %d queued, %d already queued, %d skipped",
+        run.id, stats["elapsed_s"], stats["queued"], stats["duplicates"], stats["skipped"]
+    )
+    return run
+
+
+# Runs started in this process, oldest first
+digest_runs: "OrderedDict[str, DigestRun]" = OrderedDict()
+_digest_tasks: Set[asyncio.Task] = set()
+
+
+def start_digest(subscribers: Iterable[Dict[str, Any]], campaign: Optional[str] = None) -> DigestRun:
+    """Run a digest in the background (call from the event loop); progress via digest_runs"""
+    run = DigestRun(subscribers, campaign)
+    digest_runs[run.id] = run
+    while len(digest_runs) > DIGEST_RUNS_TRACKED:
+        digest_runs.popitem(last=False)
+    task = asyncio.create_task(run_digest(run), name=f"digest-{run.id}")
+    _digest_tasks.add(task)
+    task.add_done_callback(_digest_tasks.discard)
+    return run
+
+
+async def stop_digests() -> None:
+    """Cancel digests still running (shutdown)"""
+    for task in list(_digest_tasks):
+        task.cancel()
+    await asyncio.gather(*_digest_tasks, return_exceptions=True)
+
+
+def digest_stats() -> List[Dict[str, Any]]:
+    """Stats of the most recent runs, newest first"""
+    return [run.stats() for run in reversed(digest_runs.values())][:5]
+
+
+def load_subscribers_csv(path: str) -> List[Dict[str, Any]]:
+    """Valid subscribers from a CSV with a header row; invalid rows are logged and skipped"""
+    subscribers = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), 2):
+            try:
+                subscriber = DigestSubscriber(**{k: v or None for k, v in row.items() if k})
+            except ValidationError as e:
+                logger.warning("Skipping subscriber on line %d: %s", line, e.errors()[0]["msg"])
+                continue
+            subscribers.append(subscriber.model_dump(mode="json"))
+    return subscribers
+
+
+async def _drain_outbox() -> None:
+    """Deliver due outbox emails until none are left (emails waiting for a retry stay queued)"""
+    while await outbox_dispatcher.dispatch_batch():
+        pass
+
+
+async def _main_async(path: str, campaign: Optional[str], deliver: bool, progress_seconds: float) -> Dict[str, Any]:
+    run = DigestRun(load_subscribers_csv(path), campaign)
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(progress_seconds)
+            stats = run.stats()
+            logger.info(
+                "Digest %s: %.0f%% (%d/%d markets, %d queued, %.1f emails/s)",
+                run.id, stats["progress"] * 100, stats["markets_done"], stats["markets"], stats["queued"], stats["queued_per_second"]
+            )
+
+    reporter = asyncio.create_task(report())
+    try:
+        await run_digest(run)
+        if deliver:
+            await _drain_outbox()
+    finally:
+        reporter.cancel()
+        await smtp_sender.close()
+        if async_engine is not None:
+            await async_engine.dispose()
+    return {**run.stats(), "outbox": outbox_dispatcher.stats()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue the market digest for the subscribers in a CSV file")
+    parser.add_argument("subscribers", help="CSV with columns business_name,email,city,state,category")
+    parser.add_argument("--campaign", help="Idempotency scope of the emails (default: today's UTC date)")
+    parser.add_argument("--deliver", action="store_true", help="Also deliver the queued emails here instead of leaving them to the API's outbox dispatcher")
+    parser.add_argument("--progress-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    init_db()
+    print(json.dumps(asyncio.run(_main_async(args.subscribers, args.campaign, args.deliver, args.progress_seconds)), indent=2))
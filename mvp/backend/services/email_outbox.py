@@ -0,0 +1,288 @@
+"""
+Transactional email outbox and its dispatcher
+
+Emails are rows in email_outbox, written in the same transaction as the
+state change that calls for them (e.g. a demo request completing), so an
+email is never lost and never sent for a change that rolled back. The
+dispatcher claims due rows in batches by flipping them to "sending" under
+a lease, delivers them concurrently, and records the outcome: sent,
+retried later with exponential backoff, or dead after
+OUTBOX_MAX_ATTEMPTS.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.database import EmailOutbox, EmailOutboxStatus, engine, run_in_session
+from services.analysis_store import load_results
+from services.email_service import (
+    EMAIL_RENDER_CACHE,
+    FROM_EMAIL,
+    analysis_email_fragments,
+    analysis_email_subject,
+    deliver_email
+)
+from services.email_templates import EmailFragments, render_email
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+# Sends in flight per batch
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "16"))
+# Poll interval when idle (enqueues in this process wake the dispatcher at once)
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# A claimed row not finished within this is considered abandoned and reclaimed
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+DEMO_ANALYSIS_EMAIL = "demo_analysis"
+DIGEST_EMAIL = "digest"
+
+
+def enqueue_statement(kind: str, idempotency_key: str, to_email: str, payload: Dict[str, Any]):
+    """
+    INSERT of an outbox email; a no-op if the idempotency key exists
+
+    Execute it in the transaction of the change that triggers the email.
+    """
+    dialect_insert = postgresql_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    statement = dialect_insert(EmailOutbox).values(
+        id=hashlib.sha256(idempotency_key.encode("utf-8")).hexdigest()[:32],
+        idempotency_key=idempotency_key,
+        kind=kind,
+        to_email=to_email,
+        payload=payload,
+        status=EmailOutboxStatus.PENDING,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now
+    )
+    return statement.on_conflict_do_nothing(index_elements=["idempotency_key"])
+
+
+def message_id(idempotency_key: str) -> str:
+    """Stable Message-ID, so a resend after a lost acknowledgement can be deduplicated downstream"""
+    domain = FROM_EMAIL.rsplit("@", 1)[-1]
+    return f"<{hashlib.sha256(idempotency_key.encode('utf-8')).hexdigest()[:32]}@{domain}>"
+
+
+def _render_analysis_email(payload: Dict[str, Any], fragments: Optional[EmailFragments]) -> Tuple[str, str, str]:
+    if fragments is None:
+        raise LookupError(f"Analysis {payload['analysis_hash']} not found")
+    city, state, category = payload["city"], payload.get("state") or "", payload["category"]
+    html, text = render_email(fragments, payload["business_name"], city, state, category)
+    return analysis_email_subject(city, state, category), html, text
+
+
+# kind -> render(payload, analysis email fragments) -> (subject, html, text)
+RENDERERS: Dict[str, Callable[[Dict[str, Any], Optional[EmailFragments]], Tuple[str, str, str]]] = {
+    DEMO_ANALYSIS_EMAIL: _render_analysis_email,
+    DIGEST_EMAIL: _render_analysis_email,
+}
+
+
+def _backoff(attempts: int, base: float, maximum: float) -> float:
+    return min(base * 2 ** (attempts - 1), maximum) * random.uniform(0.8, 1.2)
+
+
+def _claim_batch(db: Session, limit: int, lease_seconds: int) -> List[Dict[str, Any]]:
+    """
+    Claim up to limit due emails and load what rendering needs
+
+    Due: pending with next_attempt_at reached, or sending with an expired
+    lease. The claim is one UPDATE ... RETURNING that sets status and
+    lease, so concurrent dispatchers (other instances) never get the same
+    row; on PostgreSQL candidates are picked FOR UPDATE SKIP LOCKED.
+    """
+    now = datetime.utcnow()
+    due = or_(
+        and_(EmailOutbox.status == EmailOutboxStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == EmailOutboxStatus.SENDING, EmailOutbox.locked_until < now)
+    )
+    candidates = select(EmailOutbox.id).where(due).order_by(EmailOutbox.next_attempt_at).limit(limit)
+    if engine.dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    claimed = db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(candidates.scalar_subquery()))
+        .where(due)
+        .values(
+            status=EmailOutboxStatus.SENDING,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=EmailOutbox.attempts + 1
+        )
+        .returning(
+            EmailOutbox.id,
+            EmailOutbox.idempotency_key,
+            EmailOutbox.kind,
+            EmailOutbox.to_email,
+            EmailOutbox.payload,
+            EmailOutbox.attempts
+        )
+        .execution_options(synchronize_session=False)
+    ).mappings().all()
+    db.commit()
+
+    emails = [dict(row) for row in claimed]
+    # Resolve each analysis's email fragments once per batch (campaigns
+    # share them): from the render cache, else decompressed and rendered.
+    # Each email holds its fragments, so a later eviction cannot fail a send.
+    fragments: Dict[str, Optional[EmailFragments]] = {}
+    for email in emails:
+        analysis_hash = email["payload"].get("analysis_hash")
+        if analysis_hash and analysis_hash not in fragments:
+            cached = EMAIL_RENDER_CACHE.get(analysis_hash)
+            if cached is None:
+                results = load_results(db, analysis_hash)
+                cached = analysis_email_fragments(analysis_hash, results) if results is not None else None
+            fragments[analysis_hash] = cached
+        email["fragments"] = fragments.get(analysis_hash)
+    return emails
+
+
+def _record_outcomes(db: Session, sent: List[str], failed: List[Tuple[Dict[str, Any], str]], max_attempts: int, backoff_base: float, backoff_max: float) -> int:
+    """Mark sent rows and reschedule or dead-letter failed ones, in one commit; returns dead count"""
+    now = datetime.utcnow()
+    claimed = EmailOutbox.status == EmailOutboxStatus.SENDING
+    if sent:
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(sent))
+            .where(claimed)
+            .values(status=EmailOutboxStatus.SENT, sent_at=now, locked_until=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+    dead = 0
+    for email, error in failed:
+        values: Dict[str, Any] = {"locked_until": None, "last_error": error[:1000]}
+        if email["attempts"] >= max_attempts:
+            values["status"] = EmailOutboxStatus.DEAD
+            dead += 1
+        else:
+            values["status"] = EmailOutboxStatus.PENDING
+            values["next_attempt_at"] = now + timedelta(seconds=_backoff(email["attempts"], backoff_base, backoff_max))
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == email["id"])
+            .where(claimed)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return dead
+
+
+class OutboxDispatcher:
+    """Background task draining email_outbox in batches"""
+
+    def __init__(
+        self,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = OUTBOX_CONCURRENCY,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        backoff_base: float = OUTBOX_BACKOFF_SECONDS,
+        backoff_max: float = OUTBOX_BACKOFF_MAX_SECONDS,
+        lease_seconds: int = OUTBOX_LEASE_SECONDS
+    ):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.counters = {"batches": 0, "claimed": 0, "sent": 0, "retried": 0, "dead": 0}
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="email-outbox")
+        logger.info("Email outbox dispatcher started (batch %d, concurrency %d)", self.batch_size, self.concurrency)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def wake(self) -> None:
+        """Dispatch now instead of at the next poll (call from the event loop thread)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            # Cleared before claiming so a wake() during the batch isn't lost
+            self._wakeup.clear()
+            try:
+                claimed = await self.dispatch_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_batch(self) -> int:
+        """Claim, send and record one batch; returns the number of emails claimed"""
+        emails = await run_in_session(_claim_batch, self.batch_size, self.lease_seconds)
+        if not emails:
+            return 0
+        self.counters["batches"] += 1
+        self.counters["claimed"] += len(emails)
+
+        gate = asyncio.Semaphore(self.concurrency)
+        sent: List[str] = []
+        failed: List[Tuple[Dict[str, Any], str]] = []
+
+        async def send(email: Dict[str, Any]) -> None:
+            async with gate:
+                try:
+                    subject, html, text = RENDERERS[email["kind"]](email["payload"], email["fragments"])
+                    await deliver_email(email["to_email"], subject, html, text, message_id(email["idempotency_key"]))
+                except Exception as e:
+                    logger.warning("Outbox email %s attempt %d failed: %s", email["id"], email["attempts"], e)
+                    failed.append((email, str(e) or type(e).__name__))
+                else:
+                    sent.append(email["id"])
+
+        await asyncio.gather(*(send(email) for email in emails))
+        dead = await run_in_session(
+            _record_outcomes, sent, failed, self.max_attempts, self.backoff_base, self.backoff_max
+        )
+
+        self.counters["sent"] += len(sent)
+        self.counters["retried"] += len(failed) - dead
+        self.counters["dead"] += dead
+        if dead:
+            logger.error("%d outbox emails moved to dead letter after %d attempts", dead, self.max_attempts)
+        return len(emails)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self._task is not None, **self.counters}
+
+
+outbox_dispatcher = OutboxDispatcher()
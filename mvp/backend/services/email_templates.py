@@ -0,0 +1,271 @@
+"""
+Precompiled templates for the analysis email
+
+The HTML and plaintext shells are split into literal chunks and
+{{slot}} positions once at import, so rendering is filling a list and one
+join instead of rebuilding ~8 KB of nested f-strings and += concatenation
+per email. Rendering has two steps:
+    analysis_fragments(results): slot values that depend only on the
+        analysis, both formats built in one pass over the results
+    render_email(fragments, ...): the recipient fields plus the shells
+
+Values are HTML-escaped in the HTML part only.
+"""
+
+import re
+import sys
+from html import escape
+from typing import Any, Dict, List, Mapping, Tuple
+
+SLOT = re.compile(r"\{\{(\w+)\}\}")
+
+TOP_COMPETITORS = 5
+TOP_KPIS = 3
+
+PRIORITY_COLORS = {
+    "High": "#dc2626",
+    "Medium": "#f59e0b",
+    "Low": "#10b981"
+}
+DEFAULT_PRIORITY_COLOR = "#6b7280"
+
+
+class Template:
+    """Static text with {{slot}} placeholders, split into chunks once"""
+
+    def __init__(self, source: str):
+        self._parts = SLOT.split(source)
+        # Odd positions of the split are slot names
+        self._slots = [(i, self._parts[i]) for i in range(1, len(self._parts), 2)]
+        self.slots = frozenset(name for _, name in self._slots)
+
+    def render(self, values: Mapping[str, str]) -> str:
+        parts = self._parts.copy()
+        for i, name in self._slots:
+            parts[i] = values[name]
+        return "".join(parts)
+
+
+HTML_SHELL = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    </head>
+    <body style="margin: 0; padding: 0; font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif; background-color: #f3f4f6;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <!-- Header -->
+            <div style="background: linear-gradient(135deg, #059669 0%, #0284c7 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
+                <h1 style="margin: 0; color: white; font-size: 28px;">📊 CompeteIntel</h1>
+                <p style="margin: 10px 0 0 0; color: rgba(255,255,255,0.9); font-size: 16px;">Sua Análise Competitiva está pronta!</p>
+            </div>
+
+            <!-- Content -->
+            <div style="background: white; padding: 30px; border-radius: 0 0 12px 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
+                <h2 style="margin: 0 0 20px 0; color: #1f2937; font-size: 22px;">Olá, {{business_name}}! 👋</h2>
+
+                <p style="color: #4b5563; font-size: 15px; line-height: 1.6;">
+                    Finalizamos a análise competitiva para <strong>{{category}}</strong> em <strong>{{city}}/{{state}}</strong>.
+                    Aqui estão os principais insights:
+                </p>
+
+                <!-- Market Overview -->
+                <div style="margin: 25px 0; padding: 20px; background: #f0fdf4; border-radius: 8px; border: 1px solid #bbf7d0;">
+                    <h3 style="margin: 0 0 15px 0; color: #065f46; font-size: 18px;">📈 Visão Geral do Mercado</h3>
+                    <div style="display: flex; gap: 20px; flex-wrap: wrap;">
+                        <div style="flex: 1; min-width: 150px;">
+                            <p style="margin: 0; color: #6b7280; font-size: 13px;">Total de Concorrentes</p>
+                            <p style="margin: 5px 0 0 0; color: #1f2937; font-size: 24px; font-weight: bold;">{{total_competitors}}</p>
+                        </div>
+                        <div style="flex: 1; min-width: 150px;">
+                            <p style="margin: 0; color: #6b7280; font-size: 13px;">Nível de Saturação</p>
+                            <p style="margin: 5px 0 0 0; color: #1f2937; font-size: 24px; font-weight: bold;">{{density_level}}</p>
+                        </div>
+                        <div style="flex: 1; min-width: 150px;">
+                            <p style="margin: 0; color: #6b7280; font-size: 13px;">Score de Saturação</p>
+                            <p style="margin: 5px 0 0 0; color: #1f2937; font-size: 24px; font-weight: bold;">{{saturation_score}}/100</p>
+                        </div>
+                    </div>
+                </div>
+
+                <!-- Top Competitors -->
+                <h3 style="margin: 30px 0 15px 0; color: #1f2937; font-size: 18px;">🏆 Top 5 Concorrentes</h3>
+                <table style="width: 100%; border-collapse: collapse; margin-bottom: 25px;">
+                    <thead>
+                        <tr style="background: #f9fafb;">
+                            <th style="padding: 10px; text-align: left; color: #6b7280; font-size: 13px; font-weight: 600;">#</th>
+                            <th style="padding: 10px; text-align: left; color: #6b7280; font-size: 13px; font-weight: 600;">Nome</th>
+                            <th style="padding: 10px; text-align: left; color: #6b7280; font-size: 13px; font-weight: 600;">Nota</th>
+                            <th style="padding: 10px; text-align: left; color: #6b7280; font-size: 13px; font-weight: 600;">Avaliações</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {{competitor_rows}}
+                    </tbody>
+                </table>
+
+                <!-- KPI Recommendations -->
+                <h3 style="margin: 30px 0 15px 0; color: #1f2937; font-size: 18px;">💡 Recomendações Prioritárias</h3>
+                {{kpi_blocks}}
+
+                <!-- CTA -->
+                <div style="margin: 30px 0; padding: 20px; background: #eff6ff; border-radius: 8px; text-align: center;">
+                    <p style="margin: 0 0 15px 0; color: #1e40af; font-size: 15px;">
+                        Quer análises contínuas e alertas em tempo real?
+                    </p>
+                    <a href="http://localhost:8080#pricing" style="display: inline-block; padding: 12px 30px; background: linear-gradient(135deg, #059669 0%, #0284c7 100%); color: white; text-decoration: none; border-radius: 6px; font-weight: 600; font-size: 15px;">
+                        Ver Planos →
+                    </a>
+                </div>
+
+                <!-- Footer -->
+                <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #e5e7eb; text-align: center;">
+                    <p style="margin: 0; color: #9ca3af; font-size: 13px;">
+                        © 2024 CompeteIntel - Inteligência Competitiva para o Mercado Brasileiro
+                    </p>
+                    <p style="margin: 10px 0 0 0; color: #9ca3af; font-size: 12px;">
+                        Esta análise foi gerada automaticamente com base em dados públicos.
+                    </p>
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+HTML_COMPETITOR_ROW = Template("""
+        <tr>
+            <td style="padding: 10px; border-bottom: 1px solid #eee;">{{position}}</td>
+            <td style="padding: 10px; border-bottom: 1px solid #eee;">{{name}}</td>
+            <td style="padding: 10px; border-bottom: 1px solid #eee;">{{rating}} ⭐</td>
+            <td style="padding: 10px; border-bottom: 1px solid #eee;">{{review_count}} avaliações</td>
+        </tr>
+        """)
+
+HTML_KPI_BLOCK = Template("""
+        <div style="margin-bottom: 20px; padding: 15px; background: #f9fafb; border-radius: 8px; border-left: 4px solid {{color}};">
+            <h3 style="margin: 0 0 10px 0; color: #1f2937; font-size: 16px;">{{metric}}</h3>
+            <p style="margin: 5px 0; color: #6b7280; font-size: 14px;">
+                <strong>Atual:</strong> {{current_value}} |
+                <strong>Benchmark:</strong> {{benchmark_value}}
+            </p>
+            <p style="margin: 10px 0 0 0; color: #374151; font-size: 14px;">{{recommendation}}</p>
+        </div>
+        """)
+
+TEXT_SHELL = Template("""
+CompeteIntel - Análise Competitiva
+=====================================
+
+Olá, {{business_name}}!
+
+Sua análise competitiva para {{category}} em {{city}}/{{state}} está pronta.
+
+VISÃO GERAL DO MERCADO
+----------------------
+Total de Concorrentes: {{total_competitors}}
+Nível de Saturação: {{density_level}}
+Score de Saturação: {{saturation_score}}/100
+
+TOP 5 CONCORRENTES
+------------------
+{{competitor_rows}}
+RECOMENDAÇÕES PRIORITÁRIAS
+--------------------------
+{{kpi_blocks}}
+
+---
+© 2024 CompeteIntel
+Inteligência Competitiva para o Mercado Brasileiro
+""")
+
+TEXT_COMPETITOR_ROW = Template("{{position}}. {{name}} - {{rating}}⭐ ({{review_count}} avaliações)\n")
+
+TEXT_KPI_BLOCK = Template("""
+• {{metric}}
+  Atual: {{current_value}} | Benchmark: {{benchmark_value}}
+  Recomendação: {{recommendation}}
+""")
+
+RECIPIENT_SLOTS = ("business_name", "city", "state", "category")
+
+
+class EmailFragments:
+    """Slot values of one analysis for the HTML and plaintext shells"""
+
+    def __init__(self, html: Dict[str, str], text: Dict[str, str]):
+        self.html = html
+        self.text = text
+
+    def size(self) -> int:
+        """Approximate bytes held, for bounding caches"""
+        return sum(map(sys.getsizeof, self.html.values())) + sum(map(sys.getsizeof, self.text.values()))
+
+
+def analysis_fragments(analysis_results: Dict[str, Any]) -> EmailFragments:
+    """Render everything that depends only on the analysis, in one pass"""
+    analytics = analysis_results.get("analytics") or {}
+    competitors = analysis_results.get("competitors") or []
+    market_density = analytics.get("market_density") or {}
+    kpi_recommendations = analytics.get("kpi_recommendations") or []
+
+    total_competitors = str(market_density.get("total_competitors", 0))
+    density_level = str(market_density.get("density_level", "N/A"))
+    saturation_score = f"{market_density.get('market_saturation_score') or 0:.0f}"
+
+    html_rows: List[str] = []
+    text_rows: List[str] = []
+    for i, comp in enumerate(competitors[:TOP_COMPETITORS], 1):
+        row = {
+            "position": str(i),
+            "name": str(comp.get("name", "N/A")),
+            "rating": f"{comp.get('rating') or 0:.1f}",
+            "review_count": str(comp.get("review_count", 0))
+        }
+        text_rows.append(TEXT_COMPETITOR_ROW.render(row))
+        row["name"] = escape(row["name"])
+        html_rows.append(HTML_COMPETITOR_ROW.render(row))
+
+    html_kpis: List[str] = []
+    text_kpis: List[str] = []
+    for kpi in kpi_recommendations[:TOP_KPIS]:
+        block = {
+            name: str(kpi.get(name, "N/A"))
+            for name in ("metric", "current_value", "benchmark_value", "recommendation")
+        }
+        text_kpis.append(TEXT_KPI_BLOCK.render(block))
+        block = {name: escape(value) for name, value in block.items()}
+        block["color"] = PRIORITY_COLORS.get(kpi.get("priority", "Medium"), DEFAULT_PRIORITY_COLOR)
+        html_kpis.append(HTML_KPI_BLOCK.render(block))
+
+    return EmailFragments(
+        html={
+            "total_competitors": escape(total_competitors),
+            "density_level": escape(density_level),
+            "saturation_score": saturation_score,
+            "competitor_rows": "".join(html_rows),
+            "kpi_blocks": "".join(html_kpis)
+        },
+        text={
+            "total_competitors": total_competitors,
+            "density_level": density_level,
+            "saturation_score": saturation_score,
+            "competitor_rows": "".join(text_rows),
+            "kpi_blocks": "".join(text_kpis)
+        }
+    )
+
+
+def render_email(
+    fragments: EmailFragments,
+    business_name: str,
+    city: str,
+    state: str,
+    category: str
+) -> Tuple[str, str]:
+    """HTML and plaintext for one recipient"""
+    recipient = {"business_name": business_name, "city": city, "state": state, "category": category}
+    html = HTML_SHELL.render({**fragments.html, **{name: escape(value) for name, value in recipient.items()}})
+    text = TEXT_SHELL.render({**fragments.text, **recipient})
+    return html, text
@@ -0,0 +1,129 @@
+"""
+Execution backend for CPU-bound work (search + analytics)
+
+Keeps the event loop free so /api/health and other requests are served
+while a heavy search runs. Modes (SEARCH_EXECUTOR):
+    inline:  run on the event loop (old behaviour, lowest overhead)
+    thread:  thread pool (default); NumPy releases the GIL for array math
+    process: process pool; full parallelism, results are pickled back
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from data.competitor_store import load_competitor_store
+
+logger = logging.getLogger(__name__)
+
+SEARCH_EXECUTOR = os.getenv("SEARCH_EXECUTOR", "thread").lower()
+SEARCH_EXECUTOR_WORKERS = int(os.getenv("SEARCH_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maximum jobs running or waiting; beyond this new jobs are rejected
+SEARCH_MAX_PENDING = int(os.getenv("SEARCH_MAX_PENDING", "64"))
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the pending-job limit is reached"""
+
+
+class StageStats:
+    """Count, total and max duration (ms) of one pipeline stage"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+def _init_worker_process() -> None:
+    """Worker process setup: map the competitor store once per process"""
+    load_competitor_store()
+
+
+class PipelineExecutor:
+    """Runs blocking functions off the event loop with bounded queue depth"""
+
+    def __init__(self, mode: str = "thread", workers: int = 4, max_pending: int = 64):
+        if mode not in ("inline", "thread", "process"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.stages: Dict[str, StageStats] = {}
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Optional[Executor]:
+        if self._pool is None:
+            if self.mode == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="search")
+            elif self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker_process)
+        return self._pool
+
+    def record(self, stage: str, ms: float) -> None:
+        self.stages.setdefault(stage, StageStats()).record(ms)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) on the configured backend
+
+        Records the wall time as the "total" stage; callers record their
+        own inner stages with record().
+
+        Raises:
+            ExecutorSaturated: if max_pending jobs are already in flight
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self.pending} jobs pending")
+
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            if self.mode == "inline":
+                return fn(*args, **kwargs)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), _call, fn, args, kwargs)
+        finally:
+            self.pending -= 1
+            self.record("total", (time.perf_counter() - started) * 1000)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+        }
+
+
+def _call(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    """Module-level trampoline so kwargs survive run_in_executor (and pickling)"""
+    return fn(*args, **kwargs)
+
+
+pipeline_executor = PipelineExecutor(SEARCH_EXECUTOR, SEARCH_EXECUTOR_WORKERS, SEARCH_MAX_PENDING)
@@ -0,0 +1,57 @@
+"""
+HTTP caching helpers: pre-serialized JSON bodies, ETags and conditional GET
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(data: bytes) -> str:
+    """Strong ETag from the content hash"""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check If-None-Match against an ETag
+
+    Uses the weak comparison required for If-None-Match (RFC 9110), so
+    W/"x" matches "x", and handles lists and the "*" wildcard.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """304 response carrying the validator and caching headers"""
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+class PrecomputedJSON:
+    """
+    JSON response body encoded once, with its ETag
+
+    For content that only changes on deploy: serving it is a header
+    comparison plus writing the stored bytes.
+    """
+
+    def __init__(self, payload: Any, max_age: int = 300):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = make_etag(self.body)
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={max_age}",
+        }
+
+    def response(self, request: Request) -> Response:
+        if etag_matches(request, self.etag):
+            return not_modified(self.etag, {"Cache-Control": self.headers["Cache-Control"]})
+        return Response(content=self.body, media_type="application/json", headers=self.headers)
@@ -0,0 +1,198 @@
+"""
+In-process background job queue
+Async worker tasks with bounded concurrency, retries and exponential backoff
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# handler(job_id, report) where report(stage) publishes progress
+JobHandler = Callable[[str, Callable[[str], None]], Awaitable[Any]]
+# on_failure(job_id, error) runs once a job has exhausted its attempts
+FailureHandler = Callable[[str, Exception], Awaitable[Any]]
+# recover() returns ids of stored jobs to (re)run, e.g. left behind by a crash
+RecoveryHandler = Callable[[], Awaitable[List[str]]]
+
+
+class JobQueue:
+    """
+    Runs jobs on `concurrency` worker tasks of the current event loop
+
+    A failed job is retried up to max_attempts times, waiting
+    backoff_base * 2^(attempt-1) seconds (capped at backoff_max, with
+    jitter) between attempts. Progress per job is kept in memory for
+    status endpoints; the job's own storage stays the source of truth.
+
+    With a recover handler, the queue also asks it every recover_interval
+    seconds (first right after start) for stored jobs to run again, and
+    enqueues those not already queued or running here.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: JobHandler,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0,
+        max_tracked: int = 10000,
+        on_failure: Optional[FailureHandler] = None,
+        recover: Optional[RecoveryHandler] = None,
+        recover_interval: float = 60.0
+    ):
+        self.name = name
+        self.handler = handler
+        self.on_failure = on_failure
+        self.recover = recover
+        self.recover_interval = recover_interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_tracked = max_tracked
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._recovery: Optional[asyncio.Task] = None
+        self._retry_handles = set()
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self.counters = {"enqueued": 0, "succeeded": 0, "failed": 0, "retried": 0, "recovered": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        if self.recover is not None:
+            self._recovery = asyncio.create_task(self._recover_loop(), name=f"{self.name}-recovery")
+        logger.info("Job queue %s started with %d workers", self.name, self.concurrency)
+
+    async def stop(self) -> None:
+        if self._recovery is not None:
+            self._recovery.cancel()
+            await asyncio.gather(self._recovery, return_exceptions=True)
+            self._recovery = None
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def enqueue(self, job_id: str) -> None:
+        """Queue a job (must be called from the event loop thread)"""
+        if self._queue is None:
+            raise RuntimeError(f"Job queue {self.name} is not started")
+        self._track(job_id, {"stage": "queued", "attempts": 0, "error": None})
+        self.counters["enqueued"] += 1
+        self._queue.put_nowait(job_id)
+
+    def progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Last known progress of a job handled by this process, if any"""
+        progress = self._progress.get(job_id)
+        return dict(progress) if progress is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "waiting_retry": len(self._retry_handles),
+            **self.counters,
+        }
+
+    def _active(self, job_id: str) -> bool:
+        progress = self._progress.get(job_id)
+        return progress is not None and progress["stage"] not in ("done", "failed")
+
+    async def _recover_loop(self) -> None:
+        while True:
+            try:
+                job_ids = [job_id for job_id in await self.recover() if not self._active(job_id)]
+            except Exception:
+                logger.exception("Recovery for job queue %s failed", self.name)
+            else:
+                for job_id in job_ids:
+                    self.enqueue(job_id)
+                self.counters["recovered"] += len(job_ids)
+                if job_ids:
+                    logger.info("Job queue %s recovered %d unfinished jobs", self.name, len(job_ids))
+            await asyncio.sleep(self.recover_interval)
+
+    def _track(self, job_id: str, progress: Dict[str, Any]) -> None:
+        self._progress.pop(job_id, None)
+        self._progress[job_id] = progress
+        # Oldest first (insertion order): drop finished history beyond the bound
+        while len(self._progress) > self.max_tracked:
+            self._progress.pop(next(iter(self._progress)))
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        progress = self._progress.setdefault(job_id, {"stage": "queued", "attempts": 0, "error": None})
+        progress["attempts"] += 1
+        progress["started_at"] = time.time()
+
+        def report(stage: str) -> None:
+            progress["stage"] = stage
+
+        try:
+            await self.handler(job_id, report)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            progress["error"] = str(e)
+            if progress["attempts"] >= self.max_attempts:
+                progress["stage"] = "failed"
+                self.counters["failed"] += 1
+                logger.error("Job %s/%s failed after %d attempts: %s", self.name, job_id, progress["attempts"], e)
+                if self.on_failure is not None:
+                    try:
+                        await self.on_failure(job_id, e)
+                    except Exception:
+                        logger.exception("Failure handler for job %s/%s raised", self.name, job_id)
+                return
+
+            delay = self._backoff(progress["attempts"])
+            progress["stage"] = "retrying"
+            progress["next_attempt_at"] = time.time() + delay
+            self.counters["retried"] += 1
+            logger.warning("Job %s/%s attempt %d failed, retrying in %.1fs: %s", self.name, job_id, progress["attempts"], delay, e)
+            self._schedule_retry(job_id, delay)
+            return
+
+        progress["stage"] = "done"
+        progress["error"] = None
+        self.counters["succeeded"] += 1
+
+    def _schedule_retry(self, job_id: str, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+
+        def requeue() -> None:
+            self._retry_handles.discard(handle)
+            self._queue.put_nowait(job_id)
+
+        handle = loop.call_later(delay, requeue)
+        self._retry_handles.add(handle)
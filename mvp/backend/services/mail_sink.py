@@ -0,0 +1,163 @@
+"""
+File-based mail sink for mock email mode
+
+When MAIL_SINK_DIR is set, every mock-delivered email is also written
+there as an .eml file. Submitting only queues the fields; a background
+task builds the MIME messages and writes them in batches off the event
+loop, so the sink never slows delivery down. When the queue is full,
+emails are dropped from the sink (and counted) rather than waited on.
+
+Files are written to a temporary name and renamed, so readers only see
+complete messages. Replay them through SMTP with:
+    python -m services.mail_sink ./mail_sink --delete
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from email import message_from_binary_file
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.smtp_sender import SMTPSender, build_message
+
+logger = logging.getLogger(__name__)
+
+# Directory for .eml files; unset disables the sink
+MAIL_SINK_DIR = os.getenv("MAIL_SINK_DIR") or None
+MAIL_SINK_QUEUE_SIZE = int(os.getenv("MAIL_SINK_QUEUE_SIZE", "10000"))
+# Emails written per trip to the writer thread
+MAIL_SINK_BATCH_SIZE = 200
+
+_Email = Tuple[str, str, str, str, str, Optional[str]]
+
+
+class MailSink:
+    """Asynchronous .eml writer"""
+
+    def __init__(self, directory: Optional[str] = MAIL_SINK_DIR, queue_size: int = MAIL_SINK_QUEUE_SIZE):
+        self.directory = directory
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"written": 0, "dropped": 0, "failed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.directory is None or self._task is not None:
+            return
+        await asyncio.to_thread(os.makedirs, self.directory, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run(), name="mail-sink")
+        logger.info("Mail sink writing to %s", self.directory)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush queued emails (up to timeout) and stop the writer"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Mail sink stopped with %d emails unwritten", self._queue.qsize())
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def submit(
+        self,
+        from_email: str,
+        to_email: str,
+        subject: str,
+        html: str,
+        text: str,
+        message_id: Optional[str] = None
+    ) -> bool:
+        """Queue an email for writing; False if the sink is off or full"""
+        if self._task is None:
+            return False
+        try:
+            self._queue.put_nowait((from_email, to_email, subject, html, text, message_id))
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            return False
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < MAIL_SINK_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                written = await asyncio.to_thread(self._write_batch, batch)
+            except Exception:
+                logger.exception("Mail sink failed to write %d emails", len(batch))
+                written = 0
+            self.counters["written"] += written
+            self.counters["failed"] += len(batch) - written
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch: List[_Email]) -> int:
+        written = 0
+        for from_email, to_email, subject, html, text, message_id in batch:
+            message = build_message(from_email, to_email, subject, html, text, message_id)
+            name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:12]}"
+            path = os.path.join(self.directory, name + ".eml")
+            try:
+                with open(path + ".tmp", "wb") as f:
+                    f.write(message.as_bytes())
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                logger.warning("Mail sink could not write %s: %s", path, e)
+                continue
+            written += 1
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            **self.counters
+        }
+
+
+async def replay(directory: str, sender: SMTPSender, delete: bool = False) -> Tuple[int, int]:
+    """Send every .eml in directory, oldest first; returns (sent, failed)"""
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".eml"))
+    sent = failed = 0
+    for name in names:
+        path = os.path.join(directory, name)
+        with open(path, "rb") as f:
+            message = message_from_binary_file(f)
+        try:
+            await sender.send(message)
+        except Exception as e:
+            logger.warning("Replay of %s failed: %s", name, e)
+            failed += 1
+            continue
+        sent += 1
+        if delete:
+            os.remove(path)
+    await sender.close()
+    return sent, failed
+
+
+mail_sink = MailSink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send .eml files from a mail sink directory through SMTP (SMTP_* settings)")
+    parser.add_argument("directory", nargs="?", default=MAIL_SINK_DIR)
+    parser.add_argument("--delete", action="store_true", help="Remove each file once sent")
+    args = parser.parse_args()
+    if not args.directory:
+        parser.error("directory is required when MAIL_SINK_DIR is not set")
+
+    sent, failed = asyncio.run(replay(args.directory, SMTPSender(), args.delete))
+    print(f"Replayed {sent} emails, {failed} failed")
@@ -0,0 +1,91 @@
+"""
+Search + analytics pipeline as a single, picklable unit of work
+Runs inline, in a thread pool or in a process pool (see services.executor)
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.schemas import AnalyticsResponse, Competitor, Coordinates
+from services.competitor_service import search_competitors
+from services.analysis_service import generate_analytics
+from services.executor import pipeline_executor
+from services.singleflight import SingleFlight
+
+# Identical searches in flight at the same time run once
+search_flights = SingleFlight("search")
+
+
+def run_search_pipeline(
+    category: str,
+    city: str,
+    coordinates: Optional[Dict[str, float]] = None,
+    radius_km: float = 5.0,
+    max_results: int = 10,
+    neighborhood: Optional[str] = None,
+    cep: Optional[str] = None,
+    your_business: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Competitor], AnalyticsResponse, Dict[str, float]]:
+    """
+    Search competitors and generate analytics
+
+    Arguments are plain values (coordinates as a dict) so the call can be
+    shipped to a worker process.
+
+    Returns:
+        (competitors, analytics, stage timings in milliseconds)
+    """
+    started = time.perf_counter()
+    competitors = search_competitors(
+        category=category,
+        city=city,
+        coordinates=Coordinates(**coordinates) if coordinates else None,
+        radius_km=radius_km,
+        max_results=max_results,
+        neighborhood=neighborhood,
+        cep=cep
+    )
+    searched = time.perf_counter()
+
+    analytics = generate_analytics(
+        competitors=competitors,
+        radius_km=radius_km,
+        your_business=your_business
+    )
+    finished = time.perf_counter()
+
+    timings = {
+        "search": (searched - started) * 1000,
+        "analytics": (finished - searched) * 1000,
+    }
+    return competitors, analytics, timings
+
+
+async def execute_search_pipeline(**params: Any) -> Tuple[List[Competitor], AnalyticsResponse, Dict[str, float]]:
+    """
+    Run the pipeline on the configured executor and record per-stage timings
+
+    Timings gain "queue_wait": executor wall time not spent in a stage
+    (waiting for a worker, pickling for process pools).
+
+    Concurrent calls with identical parameters share one run (see
+    search_flights) and receive the same result objects; treat them as
+    read-only.
+
+    Raises:
+        ExecutorSaturated: if the executor's pending-job limit is reached
+    """
+    key = json.dumps(params, sort_keys=True, default=str)
+    return await search_flights.do(key, lambda: _execute(params))
+
+
+async def _execute(params: Dict[str, Any]) -> Tuple[List[Competitor], AnalyticsResponse, Dict[str, float]]:
+    started = time.perf_counter()
+    competitors, analytics, timings = await pipeline_executor.run(run_search_pipeline, **params)
+    total_ms = (time.perf_counter() - started) * 1000
+
+    timings["queue_wait"] = max(total_ms - timings["search"] - timings["analytics"], 0.0)
+    for stage, ms in timings.items():
+        pipeline_executor.record(stage, ms)
+    return competitors, analytics, timings
@@ -0,0 +1,69 @@
+"""
+Single-flight coalescing of concurrent identical async calls
+
+While a call for a key is in flight, further calls with the same key wait
+for it and receive its result (or exception) instead of starting their
+own. Nothing is cached: once the call finishes, the next one runs again.
+The shared call runs as its own task, so a caller that is cancelled (e.g.
+a client disconnect) does not cancel it for the others.
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+# false runs every call on its own (for comparison and debugging)
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+
+T = TypeVar("T")
+
+# name -> group, for /api/metrics
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key"""
+
+    def __init__(self, name: str, enabled: bool = SINGLEFLIGHT_ENABLED):
+        self.name = name
+        self.enabled = enabled
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.counters = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+        _groups[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn(), or the call already in flight for key"""
+        self.counters["calls"] += 1
+        if not self.enabled:
+            self.counters["executions"] += 1
+            return await fn()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn(), name=f"singleflight-{self.name}")
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.counters["executions"] += 1
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception even if every caller was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["errors"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.counters["calls"]
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            **self.counters,
+            "coalesced_ratio": round(self.counters["coalesced"] / calls, 4) if calls else 0.0
+        }
+
+
+def singleflight_stats() -> Dict[str, Any]:
+    return {name: group.stats() for name, group in _groups.items()}
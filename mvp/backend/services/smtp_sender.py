@@ -0,0 +1,195 @@
+"""
+Async SMTP delivery with pooled, persistent connections
+
+Connections are opened (and authenticated) once and reused for many
+messages, so a send is MAIL/RCPT/DATA on an open session instead of a
+TCP + TLS + AUTH handshake per email. Concurrent sends spread over up to
+SMTP_POOL_SIZE connections; SMTP_PER_DOMAIN_LIMIT caps in-flight sends to
+one recipient domain so large providers don't throttle us.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from email.header import Header
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, List, Optional
+
+import aiosmtplib
+
+from services.executor import StageStats
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME") or None
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD") or None
+# STARTTLS on a plain connection (587); SMTP_USE_TLS is implicit TLS (465)
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "false").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "8"))
+SMTP_PER_DOMAIN_LIMIT = int(os.getenv("SMTP_PER_DOMAIN_LIMIT", "4"))
+# Reconnect after this many messages (providers cap messages per session)
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+
+def build_message(
+    from_email: str,
+    to_email: str,
+    subject: str,
+    html: str,
+    text: str,
+    message_id: Optional[str] = None
+) -> Message:
+    """
+    multipart/alternative message with a plaintext and an HTML part
+
+    Uses the compat32 MIME classes: serializing them costs about half of
+    EmailMessage's header-registry policy.
+    """
+    message = MIMEMultipart("alternative")
+    message["From"] = from_email
+    message["To"] = to_email
+    message["Subject"] = Header(subject, "utf-8")
+    if message_id:
+        message["Message-ID"] = message_id
+    message.attach(MIMEText(text, "plain", "utf-8"))
+    message.attach(MIMEText(html, "html", "utf-8"))
+    return message
+
+
+class _Connection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages = 0
+
+
+class SMTPSender:
+    """Pool of persistent SMTP connections with per-domain concurrency limits"""
+
+    def __init__(
+        self,
+        hostname: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        username: Optional[str] = SMTP_USERNAME,
+        password: Optional[str] = SMTP_PASSWORD,
+        start_tls: bool = SMTP_STARTTLS,
+        use_tls: bool = SMTP_USE_TLS,
+        timeout: float = SMTP_TIMEOUT,
+        pool_size: int = SMTP_POOL_SIZE,
+        per_domain_limit: int = SMTP_PER_DOMAIN_LIMIT,
+        max_messages_per_connection: int = SMTP_MAX_MESSAGES_PER_CONNECTION
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.per_domain_limit = per_domain_limit
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: List[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+        self.latency = StageStats()
+        self.counters = {"sent": 0, "failed": 0, "connections_opened": 0, "reconnects": 0}
+
+    async def _connect(self) -> _Connection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        await client.connect()
+        self.counters["connections_opened"] += 1
+        return _Connection(client)
+
+    @staticmethod
+    async def _close(connection: _Connection) -> None:
+        try:
+            await connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    @asynccontextmanager
+    async def _connection(self):
+        """Borrow an open connection; it is discarded if the send fails"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            if connection is None or not connection.client.is_connected:
+                connection = await self._connect()
+            try:
+                yield connection
+            except BaseException:
+                connection.client.close()
+                raise
+            if connection.messages >= self.max_messages_per_connection:
+                await self._close(connection)
+            else:
+                self._idle.append(connection)
+
+    def _domain_slot(self, to_email: str) -> asyncio.Semaphore:
+        domain = to_email.rsplit("@", 1)[-1].lower()
+        if domain not in self._domains:
+            self._domains[domain] = asyncio.Semaphore(self.per_domain_limit)
+        return self._domains[domain]
+
+    async def send(self, message: Message) -> None:
+        """
+        Deliver one message
+
+        A connection that was closed by the server while idle is replaced
+        and the send retried once.
+
+        Raises:
+            aiosmtplib.SMTPException: if delivery fails
+        """
+        started = time.perf_counter()
+        try:
+            async with self._domain_slot(message["To"]):
+                try:
+                    await self._send_once(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    self.counters["reconnects"] += 1
+                    await self._send_once(message)
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        self.counters["sent"] += 1
+        self.latency.record((time.perf_counter() - started) * 1000)
+
+    async def _send_once(self, message: Message) -> None:
+        async with self._connection() as connection:
+            await connection.client.send_message(message)
+            connection.messages += 1
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._close(connection) for connection in idle), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "host": f"{self.hostname}:{self.port}",
+            "pool_size": self.pool_size,
+            "idle_connections": len(self._idle),
+            "per_domain_limit": self.per_domain_limit,
+            **self.counters,
+            "send_latency": self.latency.to_dict(),
+        }
+
+
+smtp_sender = SMTPSender()
@@ -0,0 +1,122 @@
+"""
+Spatial index for radius queries over competitor coordinates
+Uniform lat/lng grid stored in CSR form (points sorted by cell id)
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+from services.analysis_service import haversine_distances, EARTH_RADIUS_KM
+
+# Kilometers per degree of latitude on the Haversine sphere
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360.0
+
+
+class GridIndex:
+    """
+    Uniform grid over latitude/longitude
+
+    Points are bucketed into square-ish cells of `cell_km` and sorted by
+    cell id (row-major), so the cells of one grid row that overlap a query
+    are a single contiguous slice of the sorted points. A radius query only
+    computes distances for points inside those candidate cells.
+    """
+
+    def __init__(self, lats, lngs, cell_km: float = 1.0):
+        self.lats = np.ascontiguousarray(lats, dtype=np.float64)
+        self.lngs = np.ascontiguousarray(lngs, dtype=np.float64)
+        self.size = len(self.lats)
+
+        if self.size == 0:
+            self.origin_lat = self.origin_lng = 0.0
+            self.cell_lat = self.cell_lng = 1.0
+            self.rows = self.cols = 1
+            self.order = np.empty(0, dtype=np.int64)
+            self.sorted_cells = np.empty(0, dtype=np.int64)
+            return
+
+        self.origin_lat = float(self.lats.min())
+        self.origin_lng = float(self.lngs.min())
+
+        # Cell height in degrees is constant; width is stretched by the cosine
+        # of the densest latitude so cells are roughly cell_km wide there
+        mid_lat = float(np.median(self.lats))
+        self.cell_lat = cell_km / KM_PER_DEGREE
+        self.cell_lng = cell_km / (KM_PER_DEGREE * max(math.cos(math.radians(mid_lat)), 1e-6))
+
+        rows = ((self.lats - self.origin_lat) / self.cell_lat).astype(np.int64)
+        cols = ((self.lngs - self.origin_lng) / self.cell_lng).astype(np.int64)
+        self.rows = int(rows.max()) + 1
+        self.cols = int(cols.max()) + 1
+
+        cells = rows * self.cols + cols
+        self.order = np.argsort(cells, kind="stable")
+        self.sorted_cells = cells[self.order]
+
+    def nbytes(self) -> int:
+        """Memory of the index arrays (coordinates may be shared with the caller)"""
+        return self.lats.nbytes + self.lngs.nbytes + self.order.nbytes + self.sorted_cells.nbytes
+
+    def _candidates(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Indices of points in grid cells overlapping the query's bounding box"""
+        dlat = radius_km / KM_PER_DEGREE
+        # Longitude span grows towards the poles: use the widest latitude in the box
+        max_abs_lat = min(abs(lat) + dlat, 90.0)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        dlng = 180.0 if cos_lat < 1e-9 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+
+        row0 = max(int(math.floor((lat - dlat - self.origin_lat) / self.cell_lat)), 0)
+        row1 = min(int(math.floor((lat + dlat - self.origin_lat) / self.cell_lat)), self.rows - 1)
+        col0 = max(int(math.floor((lng - dlng - self.origin_lng) / self.cell_lng)), 0)
+        col1 = min(int(math.floor((lng + dlng - self.origin_lng) / self.cell_lng)), self.cols - 1)
+
+        if row0 > row1 or col0 > col1:
+            return np.empty(0, dtype=np.int64)
+
+        row_ids = np.arange(row0, row1 + 1, dtype=np.int64) * self.cols
+        starts = np.searchsorted(self.sorted_cells, row_ids + col0, side="left")
+        stops = np.searchsorted(self.sorted_cells, row_ids + col1, side="right")
+
+        slices = [self.order[start:stop] for start, stop in zip(starts, stops) if stop > start]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def within(self, lat: float, lng: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All points within radius_km of (lat, lng), in no particular order
+
+        Returns:
+            (point indices, distances in km)
+        """
+        candidates = self._candidates(lat, lng, radius_km)
+        if len(candidates) == 0:
+            return candidates, np.empty(0, dtype=np.float64)
+
+        distances = haversine_distances(lat, lng, self.lats[candidates], self.lngs[candidates])
+        mask = distances <= radius_km
+        return candidates[mask], distances[mask]
+
+    def query_radius(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        k: int = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Points within radius_km of (lat, lng), nearest first, at most k
+
+        Returns:
+            (point indices, distances in km) sorted by distance
+        """
+        indices, distances = self.within(lat, lng, radius_km)
+
+        if k is not None and k < len(indices):
+            nearest = np.argpartition(distances, k - 1)[:k]
+            indices, distances = indices[nearest], distances[nearest]
+
+        order = np.argsort(distances, kind="stable")
+        return indices[order], distances[order]